@@ -2,9 +2,15 @@
 Authentication API endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.security import (
+    verify_password,
+    get_password_hash,
+    create_access_token,
+    DUMMY_PASSWORD_HASH
+)
 from app.core.dependencies import get_current_active_user
 from app.models.user import User
 from app.schemas.auth import UserRegister, UserLogin, Token, UserResponse
@@ -16,67 +22,80 @@ router = APIRouter()
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserRegister,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Register a new user"""
     # Check if user already exists
-    existing_user = db.query(User).filter(
-        User.email == user_data.email,
-        User.deleted_at.is_(None)
-    ).first()
-    
+    result = await db.execute(
+        select(User).where(
+            User.email == user_data.email,
+            User.deleted_at.is_(None)
+        )
+    )
+    existing_user = result.scalar_one_or_none()
+
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
-    
-    # Create new user
+
+    # Create new user — INSERT ... RETURNING вместо commit + refresh-SELECT
     hashed_password = get_password_hash(user_data.password)
-    new_user = User(
-        email=user_data.email,
-        password_hash=hashed_password,
-        full_name=user_data.full_name
+    result = await db.execute(
+        insert(User).values(
+            email=user_data.email,
+            password_hash=hashed_password,
+            full_name=user_data.full_name
+        ).returning(User)
     )
-    
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    
+    new_user = result.scalar_one()
+    await db.commit()
+
     return new_user
 
 
 @router.post("/login", response_model=Token)
 async def login(
     credentials: UserLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Login and get access token"""
-    user = db.query(User).filter(
-        User.email == credentials.email,
-        User.deleted_at.is_(None)
-    ).first()
-    
-    if not user or not verify_password(credentials.password, user.password_hash):
+    result = await db.execute(
+        select(User).where(
+            User.email == credentials.email,
+            User.deleted_at.is_(None)
+        )
+    )
+    user = result.scalar_one_or_none()
+
+    # Всегда платим стоимость bcrypt, даже если пользователя нет —
+    # иначе быстрый ответ выдает, что email не зарегистрирован
+    password_ok = verify_password(
+        credentials.password,
+        user.password_hash if user else DUMMY_PASSWORD_HASH
+    )
+
+    if not user or not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is inactive"
         )
-    
+
     # Create access token
     access_token_expires = timedelta(minutes=30)
     access_token = create_access_token(
         data={"sub": str(user.id)},
         expires_delta=access_token_expires
     )
-    
+
     return {"access_token": access_token, "token_type": "bearer"}
 
 
@@ -86,4 +105,3 @@ async def get_current_user_info(
 ):
     """Get current user information"""
     return current_user
-
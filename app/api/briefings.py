@@ -2,10 +2,12 @@
 Briefings API endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import Integer, bindparam, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from datetime import date, datetime, timedelta
-from app.core.database import get_db
+from datetime import date
+from app.core.database import get_db, get_db_readonly
+from app.core.utils import utcnow
 from app.core.dependencies import get_current_active_user
 from app.models.user import User
 from app.models.briefing import Briefing, BriefingContent, BriefingStatus
@@ -14,77 +16,111 @@ from app.tasks.briefing import generate_briefing
 
 router = APIRouter()
 
+# Горячие statement'ы собираются один раз при импорте: на мелких запросах
+# компиляция Core стоит дороже самого round-trip'а, кэш engine переиспользует
+# уже скомпилированный SQL по идентичности statement'а
+_SEL_BRIEFINGS = (
+    select(Briefing)
+    .where(
+        Briefing.user_id == bindparam("uid"),
+        # current_date считается на стороне БД: один источник времени,
+        # параметры стабильны для кэша планов. Явный Integer, иначе тип
+        # выводится из date-контекста и asyncpg рендерит $2::DATE
+        Briefing.date >= func.current_date() - bindparam("days", type_=Integer)
+    )
+    .order_by(Briefing.date.desc())
+)
+_SEL_TODAY_BRIEFING = select(Briefing).where(
+    Briefing.user_id == bindparam("uid"),
+    Briefing.date == func.current_date()
+)
+_SEL_BRIEFING_BY_DATE = select(Briefing).where(
+    Briefing.user_id == bindparam("uid"),
+    Briefing.date == bindparam("target_date")
+)
+_SEL_BRIEFING_BY_ID = select(Briefing).where(
+    Briefing.id == bindparam("bid"),
+    Briefing.user_id == bindparam("uid")
+)
+
 
 @router.get("/", response_model=List[BriefingResponse])
 async def get_briefings(
     days: int = 7,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    # Чтение списков идет с реплики — не конкурирует с записью на primary
+    db: AsyncSession = Depends(get_db_readonly)
 ):
     """Get user's briefings (last N days)"""
-    cutoff_date = date.today() - timedelta(days=days)
-    
-    briefings = db.query(Briefing).filter(
-        Briefing.user_id == current_user.id,
-        Briefing.date >= cutoff_date
-    ).order_by(Briefing.date.desc()).all()
-    
-    return briefings
+    result = await db.execute(
+        _SEL_BRIEFINGS, {"uid": current_user.id, "days": days}
+    )
+
+    return result.scalars().all()
 
 
 @router.get("/today", response_model=Optional[BriefingResponse])
 async def get_today_briefing(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db_readonly)
 ):
     """Get today's briefing"""
-    briefing = db.query(Briefing).filter(
-        Briefing.user_id == current_user.id,
-        Briefing.date == date.today()
-    ).first()
-    
-    return briefing
+    result = await db.execute(
+        _SEL_TODAY_BRIEFING, {"uid": current_user.id}
+    )
+
+    return result.scalar_one_or_none()
 
 
 @router.get("/{briefing_id}", response_model=BriefingDetailResponse)
 async def get_briefing(
     briefing_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db_readonly)
 ):
     """Get briefing details with content items"""
-    briefing = db.query(Briefing).filter(
-        Briefing.id == briefing_id,
-        Briefing.user_id == current_user.id
-    ).first()
-    
+    result = await db.execute(
+        _SEL_BRIEFING_BY_ID, {"bid": briefing_id, "uid": current_user.id}
+    )
+    briefing = result.scalar_one_or_none()
+
     if not briefing:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Briefing not found"
         )
-    
-    # Get briefing content
-    briefing_content = db.query(BriefingContent).filter(
-        BriefingContent.briefing_id == briefing.id
-    ).order_by(BriefingContent.order).all()
-    
-    # Format response
+
+    # Get briefing content joined with content items in a single query
+    # (avoids one SELECT per BriefingContent row). Обрезаем текст на стороне
+    # БД — полные статьи не гоняются по сети ради первых 200 символов.
     from app.models.content import ContentItem
+    result = await db.execute(
+        select(
+            BriefingContent,
+            ContentItem.title,
+            func.substr(ContentItem.text_content, 1, 200).label("preview")
+        ).outerjoin(
+            ContentItem, ContentItem.id == BriefingContent.content_id
+        ).where(
+            BriefingContent.briefing_id == briefing.id
+        ).order_by(BriefingContent.order)
+    )
+    rows = result.all()
+
+    # Format response
     content_items = []
-    for bc in briefing_content:
-        content = db.query(ContentItem).filter(ContentItem.id == bc.content_id).first()
+    for bc, title, preview in rows:
         content_items.append({
             "id": str(bc.id),
             "content_id": str(bc.content_id),
             "order": bc.order,
             "included_reason": bc.included_reason,
-            "content_title": content.title if content else None,
-            "content_text": (content.text_content[:200] if content and content.text_content else None)
+            "content_title": title,
+            "content_text": preview
         })
-    
+
     return {
-        **BriefingResponse.from_orm(briefing).dict(),
+        **BriefingResponse.model_validate(briefing).model_dump(),
         "content_items": content_items
     }
 
@@ -93,39 +129,42 @@ async def get_briefing(
 async def trigger_briefing_generation(
     target_date: Optional[date] = None,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Manually trigger briefing generation"""
     if not target_date:
         target_date = date.today()
-    
+
     # Check if briefing already exists
-    existing = db.query(Briefing).filter(
-        Briefing.user_id == current_user.id,
-        Briefing.date == target_date
-    ).first()
-    
+    result = await db.execute(
+        _SEL_BRIEFING_BY_DATE,
+        {"uid": current_user.id, "target_date": target_date}
+    )
+    existing = result.scalar_one_or_none()
+
     if existing and existing.status == BriefingStatus.DELIVERED:
         return existing
-    
+
     # Queue briefing generation
     task = generate_briefing.delay(str(current_user.id), target_date.isoformat())
-    
+
     # Create or update briefing record
     if existing:
         existing.status = BriefingStatus.GENERATING
         briefing = existing
+        await db.commit()
     else:
-        briefing = Briefing(
-            user_id=current_user.id,
-            date=target_date,
-            status=BriefingStatus.GENERATING
+        # INSERT ... RETURNING — серверные значения приходят сразу, без refresh
+        result = await db.execute(
+            insert(Briefing).values(
+                user_id=current_user.id,
+                date=target_date,
+                status=BriefingStatus.GENERATING
+            ).returning(Briefing)
         )
-        db.add(briefing)
-    
-    db.commit()
-    db.refresh(briefing)
-    
+        briefing = result.scalar_one()
+        await db.commit()
+
     return briefing
 
 
@@ -133,25 +172,23 @@ async def trigger_briefing_generation(
 async def mark_briefing_delivered(
     briefing_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Mark briefing as delivered"""
-    briefing = db.query(Briefing).filter(
-        Briefing.id == briefing_id,
-        Briefing.user_id == current_user.id
-    ).first()
-    
+    result = await db.execute(
+        _SEL_BRIEFING_BY_ID, {"bid": briefing_id, "uid": current_user.id}
+    )
+    briefing = result.scalar_one_or_none()
+
     if not briefing:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Briefing not found"
         )
-    
+
     briefing.status = BriefingStatus.DELIVERED
-    briefing.delivered_at = datetime.utcnow()
-    
-    db.commit()
-    db.refresh(briefing)
-    
-    return briefing
+    briefing.delivered_at = utcnow()
 
+    await db.commit()
+
+    return briefing
@@ -2,13 +2,21 @@
 Data sources API endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
 from typing import List, Dict, Any
+import asyncio
+import base64
+import hashlib
 import secrets
+import time
+from jose import jwt, JWTError
 from app.core.database import get_db
 from app.core.dependencies import get_current_active_user
 from app.core.config import settings
-from app.core.encryption import encrypt_data, decrypt_data
+from app.core.encryption import encrypt_credentials
 from app.models.user import User
 from app.models.data_source import DataSource, SourceType
 from app.schemas.data_source import (
@@ -26,49 +34,91 @@ from app.services.twitter_oauth import TwitterOAuth
 from app.services.facebook_oauth import FacebookOAuth
 from app.services.instagram_oauth import InstagramOAuth
 from app.services.telegram_client import TelegramClient
+from app.services.telegram_oauth import TelegramBotSetup
 
 router = APIRouter()
 
-# OAuth credentials (should be in .env)
-TWITTER_CLIENT_ID = getattr(settings, "TWITTER_CLIENT_ID", "")
-TWITTER_CLIENT_SECRET = getattr(settings, "TWITTER_CLIENT_SECRET", "")
-FACEBOOK_APP_ID = getattr(settings, "FACEBOOK_APP_ID", "")
-FACEBOOK_APP_SECRET = getattr(settings, "FACEBOOK_APP_SECRET", "")
-INSTAGRAM_APP_ID = getattr(settings, "INSTAGRAM_APP_ID", "")
-INSTAGRAM_APP_SECRET = getattr(settings, "INSTAGRAM_APP_SECRET", "")
-TELEGRAM_BOT_TOKEN = getattr(settings, "TELEGRAM_BOT_TOKEN", "")
+# OAuth credentials (from .env), прочитаны в константы один раз при импорте
+TWITTER_CLIENT_ID = settings.TWITTER_CLIENT_ID
+TWITTER_CLIENT_SECRET = settings.TWITTER_CLIENT_SECRET
+FACEBOOK_APP_ID = settings.FACEBOOK_APP_ID
+FACEBOOK_APP_SECRET = settings.FACEBOOK_APP_SECRET
+INSTAGRAM_APP_ID = settings.INSTAGRAM_APP_ID
+INSTAGRAM_APP_SECRET = settings.INSTAGRAM_APP_SECRET
+TELEGRAM_BOT_TOKEN = settings.TELEGRAM_BOT_TOKEN
+
+
+async def _upsert_data_source(
+    db: AsyncSession,
+    *,
+    user_id,
+    source_type: SourceType,
+    name: str,
+    credentials: Dict[str, Any],
+    source_settings: Dict[str, Any],
+    conflict_key: str
+) -> DataSource:
+    """Atomically create or update a data source in a single round-trip.
+
+    Вместо SELECT + INSERT/UPDATE + refresh (3 запроса и гонка между
+    параллельными callback'ами) — один INSERT ... ON CONFLICT DO UPDATE
+    по partial unique индексу провайдера.
+    """
+    stmt = pg_insert(DataSource).values(
+        user_id=user_id,
+        source_type=source_type,
+        name=name,
+        credentials=credentials,
+        settings=source_settings,
+        is_active=True
+    ).on_conflict_do_update(
+        index_elements=[DataSource.user_id, text(f"(settings->>'{conflict_key}')")],
+        index_where=DataSource.source_type == source_type,
+        set_={
+            "credentials": credentials,
+            "name": name,
+            "settings": source_settings,
+            "is_active": True,
+            "updated_at": func.now()
+        }
+    ).returning(DataSource)
+
+    result = await db.execute(stmt)
+    source = result.scalar_one()
+    await db.commit()
+    return source
 
 
 @router.get("/", response_model=List[DataSourceResponse])
 async def get_data_sources(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all data sources for current user"""
-    sources = db.query(DataSource).filter(
-        DataSource.user_id == current_user.id
-    ).all()
-    return sources
+    result = await db.execute(
+        select(DataSource).where(DataSource.user_id == current_user.id)
+    )
+    return result.scalars().all()
 
 
 @router.post("/", response_model=DataSourceResponse, status_code=status.HTTP_201_CREATED)
 async def create_data_source(
     source_data: DataSourceCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new data source"""
-    new_source = DataSource(
-        user_id=current_user.id,
-        source_type=source_data.source_type,
-        name=source_data.name,
-        settings=source_data.settings
+    result = await db.execute(
+        insert(DataSource).values(
+            user_id=current_user.id,
+            source_type=source_data.source_type,
+            name=source_data.name,
+            settings=source_data.settings
+        ).returning(DataSource)
     )
-    
-    db.add(new_source)
-    db.commit()
-    db.refresh(new_source)
-    
+    new_source = result.scalar_one()
+    await db.commit()
+
     return new_source
 
 
@@ -90,19 +140,34 @@ async def init_twitter_oauth(
         redirect_uri=redirect_uri
     )
     
-    # Generate state for CSRF protection
-    state = secrets.token_urlsafe(32)
-    code_challenge = secrets.token_urlsafe(32)
-    
+    # Real PKCE verifier/challenge (S256)
+    code_verifier = secrets.token_urlsafe(64)
+    code_challenge = base64.urlsafe_b64encode(
+        hashlib.sha256(code_verifier.encode()).digest()
+    ).rstrip(b"=").decode()
+
+    # Self-contained state: uid и verifier лежат в подписанном короткоживущем
+    # JWT, callback проверяет подпись локально — без похода в Redis
+    state = jwt.encode(
+        {
+            "sub": str(current_user.id),
+            "cv": code_verifier,
+            "ru": redirect_uri,
+            "exp": int(time.time()) + 600
+        },
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM
+    )
+
     auth_url = twitter_oauth.get_authorization_url(
         state=state,
-        code_challenge=code_challenge
+        code_challenge=code_challenge,
+        code_challenge_method="S256"
     )
-    
+
     return {
         "authorization_url": auth_url,
-        "state": state,
-        "code_verifier": code_challenge  # In production, store this securely
+        "state": state
     }
 
 
@@ -110,7 +175,7 @@ async def init_twitter_oauth(
 async def twitter_oauth_callback(
     callback_data: TwitterOAuthCallback,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Handle Twitter OAuth callback"""
     if not TWITTER_CLIENT_ID or not TWITTER_CLIENT_SECRET:
@@ -125,74 +190,82 @@ async def twitter_oauth_callback(
         redirect_uri=callback_data.redirect_uri
     )
     
+    # Verify the signed state and recover the PKCE verifier from it
+    try:
+        state_payload = jwt.decode(
+            callback_data.state,
+            settings.SECRET_KEY,
+            algorithms=[settings.ALGORITHM]
+        )
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unknown or expired OAuth state"
+        )
+
+    if state_payload.get("sub") != str(current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="OAuth state was issued for another user"
+        )
+
+    code_verifier = state_payload.get("cv")
+
     # Exchange code for tokens
     tokens = await twitter_oauth.exchange_code_for_tokens(
         code=callback_data.code,
-        code_verifier=callback_data.state  # In production, retrieve from storage
+        code_verifier=code_verifier
     )
     
     # Get user info
     user_info = await twitter_oauth.get_user_info(tokens["access_token"])
     twitter_user = user_info.get("data", {})
     
-    # Encrypt and store credentials
-    credentials = {
-        "access_token": encrypt_data(tokens["access_token"]),
-        "refresh_token": encrypt_data(tokens.get("refresh_token", "")),
+    # Encrypt and store credentials (весь dict одним GCM-блобом)
+    credentials = encrypt_credentials({
+        "access_token": tokens["access_token"],
+        "refresh_token": tokens.get("refresh_token", ""),
         "token_type": tokens.get("token_type", "bearer"),
         "expires_in": tokens.get("expires_in"),
         "twitter_user_id": twitter_user.get("id"),
         "twitter_username": twitter_user.get("username")
-    }
-    
-    # Create or update data source
-    existing_source = db.query(DataSource).filter(
-        DataSource.user_id == current_user.id,
-        DataSource.source_type == SourceType.TWITTER,
-        DataSource.settings["twitter_user_id"].astext == twitter_user.get("id")
-    ).first()
+    })
     
-    if existing_source:
-        existing_source.credentials = credentials
-        existing_source.name = f"Twitter: @{twitter_user.get('username')}"
-        existing_source.is_active = True
-        db.commit()
-        db.refresh(existing_source)
-        return existing_source
-    else:
-        new_source = DataSource(
-            user_id=current_user.id,
-            source_type=SourceType.TWITTER,
-            name=f"Twitter: @{twitter_user.get('username')}",
-            credentials=credentials,
-            is_active=True
-        )
-        db.add(new_source)
-        db.commit()
-        db.refresh(new_source)
-        return new_source
+    # Create or update data source (atomic upsert)
+    return await _upsert_data_source(
+        db,
+        user_id=current_user.id,
+        source_type=SourceType.TWITTER,
+        name=f"Twitter: @{twitter_user.get('username')}",
+        credentials=credentials,
+        source_settings={"twitter_user_id": twitter_user.get("id")},
+        conflict_key="twitter_user_id"
+    )
 
 
 @router.delete("/{source_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_data_source(
     source_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a data source"""
-    source = db.query(DataSource).filter(
-        DataSource.id == source_id,
-        DataSource.user_id == current_user.id
-    ).first()
-    
+    result = await db.execute(
+        select(DataSource).where(
+            DataSource.id == source_id,
+            DataSource.user_id == current_user.id
+        )
+    )
+    source = result.scalar_one_or_none()
+
     if not source:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Data source not found"
         )
-    
-    db.delete(source)
-    db.commit()
+
+    await db.delete(source)
+    await db.commit()
     return None
 
 
@@ -201,62 +274,53 @@ async def delete_data_source(
 async def connect_telegram_bot(
     bot_data: TelegramBotConnect,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Connect Telegram bot"""
-    from app.services.telegram_client import TelegramClient
-    import asyncio
-    
-    # Verify bot token
+    # Verify bot token on the running event loop
     telegram_client = TelegramClient(bot_data.bot_token)
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
     try:
-        bot_info = loop.run_until_complete(telegram_client.get_me())
+        bot_info = await telegram_client.get_me()
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid bot token: {str(e)}"
         )
-    finally:
-        loop.close()
-    
-    # Encrypt and store credentials
-    credentials = {
-        "bot_token": encrypt_data(bot_data.bot_token),
-        "bot_username": bot_info.get("result", {}).get("username", ""),
-        "bot_id": str(bot_info.get("result", {}).get("id", ""))
-    }
-    
-    # Create or update data source
-    existing_source = db.query(DataSource).filter(
-        DataSource.user_id == current_user.id,
-        DataSource.source_type == SourceType.TELEGRAM,
-        DataSource.settings["bot_id"].astext == credentials["bot_id"]
-    ).first()
     
-    bot_username = credentials.get("bot_username", "bot")
-    if existing_source:
-        existing_source.credentials = credentials
-        existing_source.name = f"Telegram: @{bot_username}"
-        existing_source.settings = {"chat_ids": bot_data.chat_ids or []}
-        existing_source.is_active = True
-        db.commit()
-        db.refresh(existing_source)
-        return existing_source
-    else:
-        new_source = DataSource(
-            user_id=current_user.id,
-            source_type=SourceType.TELEGRAM,
-            name=f"Telegram: @{bot_username}",
-            credentials=credentials,
-            settings={"chat_ids": bot_data.chat_ids or []},
-            is_active=True
+    # Encrypt and store credentials (весь dict одним GCM-блобом)
+    bot_username = bot_info.get("result", {}).get("username", "")
+    bot_id = str(bot_info.get("result", {}).get("id", ""))
+    credentials = encrypt_credentials({
+        "bot_token": bot_data.bot_token,
+        "bot_username": bot_username,
+        "bot_id": bot_id
+    })
+
+    # Webhook вместо поллинга getUpdates: Telegram пушит обновления сам,
+    # секрет в пути связывает вызов с источником
+    webhook_secret = secrets.token_urlsafe(32)
+    if settings.WEBHOOK_BASE_URL:
+        bot_setup = TelegramBotSetup(bot_data.bot_token)
+        await bot_setup.set_webhook(
+            f"{settings.WEBHOOK_BASE_URL}/webhooks/telegram/{webhook_secret}",
+            allowed_updates=["message", "channel_post"],
+            max_connections=100
         )
-        db.add(new_source)
-        db.commit()
-        db.refresh(new_source)
-        return new_source
+
+    # Create or update data source (atomic upsert)
+    return await _upsert_data_source(
+        db,
+        user_id=current_user.id,
+        source_type=SourceType.TELEGRAM,
+        name=f"Telegram: @{bot_username}",
+        credentials=credentials,
+        source_settings={
+            "bot_id": bot_id,
+            "chat_ids": bot_data.chat_ids or [],
+            "webhook_secret": webhook_secret
+        },
+        conflict_key="bot_id"
+    )
 
 
 # Facebook endpoints
@@ -291,7 +355,7 @@ async def init_facebook_oauth(
 async def facebook_oauth_callback(
     callback_data: FacebookOAuthCallback,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Handle Facebook OAuth callback"""
     if not FACEBOOK_APP_ID or not FACEBOOK_APP_SECRET:
@@ -310,47 +374,32 @@ async def facebook_oauth_callback(
     tokens = await facebook_oauth.exchange_code_for_tokens(callback_data.code)
     access_token = tokens.get("access_token")
     
-    # Get long-lived token
-    long_lived = await facebook_oauth.get_long_lived_token(access_token)
+    # Get long-lived token and user info in parallel — обоим достаточно
+    # короткоживущего токена, экономим один HTTP round-trip
+    long_lived, user_info = await asyncio.gather(
+        facebook_oauth.get_long_lived_token(access_token),
+        facebook_oauth.get_user_info(access_token)
+    )
     long_lived_token = long_lived.get("access_token", access_token)
     
-    # Get user info
-    user_info = await facebook_oauth.get_user_info(long_lived_token)
-    
-    # Encrypt and store credentials
-    credentials = {
-        "access_token": encrypt_data(long_lived_token),
+    # Encrypt and store credentials (весь dict одним GCM-блобом)
+    credentials = encrypt_credentials({
+        "access_token": long_lived_token,
         "expires_in": long_lived.get("expires_in", tokens.get("expires_in")),
         "facebook_user_id": user_info.get("id"),
         "facebook_name": user_info.get("name", "")
-    }
-    
-    # Create or update data source
-    existing_source = db.query(DataSource).filter(
-        DataSource.user_id == current_user.id,
-        DataSource.source_type == SourceType.FACEBOOK,
-        DataSource.settings["facebook_user_id"].astext == user_info.get("id")
-    ).first()
+    })
     
-    if existing_source:
-        existing_source.credentials = credentials
-        existing_source.name = f"Facebook: {user_info.get('name', 'User')}"
-        existing_source.is_active = True
-        db.commit()
-        db.refresh(existing_source)
-        return existing_source
-    else:
-        new_source = DataSource(
-            user_id=current_user.id,
-            source_type=SourceType.FACEBOOK,
-            name=f"Facebook: {user_info.get('name', 'User')}",
-            credentials=credentials,
-            is_active=True
-        )
-        db.add(new_source)
-        db.commit()
-        db.refresh(new_source)
-        return new_source
+    # Create or update data source (atomic upsert)
+    return await _upsert_data_source(
+        db,
+        user_id=current_user.id,
+        source_type=SourceType.FACEBOOK,
+        name=f"Facebook: {user_info.get('name', 'User')}",
+        credentials=credentials,
+        source_settings={"facebook_user_id": user_info.get("id")},
+        conflict_key="facebook_user_id"
+    )
 
 
 # Instagram endpoints
@@ -385,7 +434,7 @@ async def init_instagram_oauth(
 async def instagram_oauth_callback(
     callback_data: InstagramOAuthCallback,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Handle Instagram OAuth callback"""
     if not INSTAGRAM_APP_ID or not INSTAGRAM_APP_SECRET:
@@ -407,39 +456,22 @@ async def instagram_oauth_callback(
     # Get user info
     user_info = await instagram_oauth.get_user_info(access_token)
     
-    # Encrypt and store credentials
-    credentials = {
-        "access_token": encrypt_data(access_token),
+    # Encrypt and store credentials (весь dict одним GCM-блобом)
+    credentials = encrypt_credentials({
+        "access_token": access_token,
         "user_id": user_info.get("id"),
         "username": user_info.get("username", "")
-    }
-    
-    # Create or update data source
-    existing_source = db.query(DataSource).filter(
-        DataSource.user_id == current_user.id,
-        DataSource.source_type == SourceType.INSTAGRAM,
-        DataSource.settings["user_id"].astext == user_info.get("id")
-    ).first()
+    })
     
+    # Create or update data source (atomic upsert)
     username = user_info.get("username", "user")
-    if existing_source:
-        existing_source.credentials = credentials
-        existing_source.name = f"Instagram: @{username}"
-        existing_source.is_active = True
-        db.commit()
-        db.refresh(existing_source)
-        return existing_source
-    else:
-        new_source = DataSource(
-            user_id=current_user.id,
-            source_type=SourceType.INSTAGRAM,
-            name=f"Instagram: @{username}",
-            credentials=credentials,
-            settings={"user_id": user_info.get("id")},
-            is_active=True
-        )
-        db.add(new_source)
-        db.commit()
-        db.refresh(new_source)
-        return new_source
+    return await _upsert_data_source(
+        db,
+        user_id=current_user.id,
+        source_type=SourceType.INSTAGRAM,
+        name=f"Instagram: @{username}",
+        credentials=credentials,
+        source_settings={"user_id": user_info.get("id")},
+        conflict_key="user_id"
+    )
 
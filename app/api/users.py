@@ -2,9 +2,13 @@
 User management API endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+import orjson
 from app.core.database import get_db
 from app.core.dependencies import get_current_active_user
+from app.core.redis_client import redis_client
+from app.core.utils import utcnow
 from app.models.user import User
 from app.models.preferences import UserPreferences
 from app.schemas.user import UserUpdate, UserPreferencesUpdate, SubscriptionUpdate
@@ -12,6 +16,29 @@ from app.schemas.auth import UserResponse
 
 router = APIRouter()
 
+# Настройки меняются редко, а читаются на каждый запрос — держим их в Redis
+PREFS_CACHE_TTL = 300  # 5 минут
+
+
+def _prefs_cache_key(user_id) -> str:
+    return f"prefs:{user_id}"
+
+
+def _prefs_to_dict(preferences: UserPreferences) -> dict:
+    return {
+        "id": str(preferences.id),
+        "user_id": str(preferences.user_id),
+        "categories_priority": preferences.categories_priority,
+        "topics_interest": preferences.topics_interest,
+        "sources_priority": preferences.sources_priority,
+        "min_relevance_score": preferences.min_relevance_score,
+        "max_items_per_briefing": preferences.max_items_per_briefing,
+        "language": preferences.language,
+        "voice_preference": preferences.voice_preference,
+        "created_at": preferences.created_at.isoformat() if preferences.created_at else None,
+        "updated_at": preferences.updated_at.isoformat() if preferences.updated_at else None
+    }
+
 
 @router.get("/profile", response_model=UserResponse)
 async def get_profile(
@@ -25,73 +52,94 @@ async def get_profile(
 async def update_profile(
     user_data: UserUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update user profile"""
-    if user_data.full_name is not None:
-        current_user.full_name = user_data.full_name
-    if user_data.timezone is not None:
-        current_user.timezone = user_data.timezone
-    if user_data.briefing_time is not None:
-        current_user.briefing_time = user_data.briefing_time
-    
-    db.commit()
-    db.refresh(current_user)
-    return current_user
+    # Только присланные поля, одним UPDATE без refresh-SELECT'а
+    patch = user_data.model_dump(exclude_unset=True)
+    if not patch:
+        return current_user
+
+    result = await db.execute(
+        update(User)
+        .where(User.id == current_user.id)
+        .values(**patch)
+        .returning(User)
+    )
+    updated_user = result.scalar_one()
+    await db.commit()
+    return updated_user
 
 
 @router.get("/preferences")
 async def get_preferences(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get user preferences"""
-    preferences = db.query(UserPreferences).filter(
-        UserPreferences.user_id == current_user.id
-    ).first()
-    
+    cache_key = _prefs_cache_key(current_user.id)
+    cached = await redis_client.get(cache_key)
+    if cached:
+        return orjson.loads(cached)
+
+    result = await db.execute(
+        select(UserPreferences).where(
+            UserPreferences.user_id == current_user.id
+        )
+    )
+    preferences = result.scalar_one_or_none()
+
     if not preferences:
-        # Create default preferences
-        preferences = UserPreferences(user_id=current_user.id)
-        db.add(preferences)
-        db.commit()
-        db.refresh(preferences)
-    
-    return preferences
+        # Create default preferences (RETURNING отдает серверные значения без refresh)
+        result = await db.execute(
+            insert(UserPreferences)
+            .values(user_id=current_user.id)
+            .returning(UserPreferences)
+        )
+        preferences = result.scalar_one()
+        await db.commit()
+
+    prefs_dict = _prefs_to_dict(preferences)
+    await redis_client.setex(cache_key, PREFS_CACHE_TTL, orjson.dumps(prefs_dict))
+    return prefs_dict
 
 
 @router.patch("/preferences")
 async def update_preferences(
     prefs_data: UserPreferencesUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update user preferences"""
-    preferences = db.query(UserPreferences).filter(
-        UserPreferences.user_id == current_user.id
-    ).first()
-    
-    if not preferences:
-        preferences = UserPreferences(user_id=current_user.id)
-        db.add(preferences)
-    
-    if prefs_data.categories_priority is not None:
-        preferences.categories_priority = prefs_data.categories_priority
-    if prefs_data.topics_interest is not None:
-        preferences.topics_interest = prefs_data.topics_interest
-    if prefs_data.sources_priority is not None:
-        preferences.sources_priority = prefs_data.sources_priority
-    if prefs_data.min_relevance_score is not None:
-        preferences.min_relevance_score = prefs_data.min_relevance_score
-    if prefs_data.max_items_per_briefing is not None:
-        preferences.max_items_per_briefing = prefs_data.max_items_per_briefing
-    if prefs_data.language is not None:
-        preferences.language = prefs_data.language
-    if prefs_data.voice_preference is not None:
-        preferences.voice_preference = prefs_data.voice_preference
-    
-    db.commit()
-    db.refresh(preferences)
+    # Только присланные поля, одним UPDATE без refresh-SELECT'а
+    patch = prefs_data.model_dump(exclude_unset=True)
+
+    preferences = None
+    if patch:
+        result = await db.execute(
+            update(UserPreferences)
+            .where(UserPreferences.user_id == current_user.id)
+            .values(**patch)
+            .returning(UserPreferences)
+        )
+        preferences = result.scalar_one_or_none()
+
+    if preferences is None:
+        # Строки еще нет (или пустой PATCH) — создаем/читаем через ORM
+        result = await db.execute(
+            select(UserPreferences).where(
+                UserPreferences.user_id == current_user.id
+            )
+        )
+        preferences = result.scalar_one_or_none()
+        if preferences is None:
+            preferences = UserPreferences(user_id=current_user.id, **patch)
+            db.add(preferences)
+
+    await db.commit()
+
+    # Write-through инвалидация, чтобы кэш не отдавал старые настройки
+    await redis_client.delete(_prefs_cache_key(current_user.id))
     return preferences
 
 
@@ -111,44 +159,41 @@ async def get_subscription(
 async def update_subscription(
     subscription_data: SubscriptionUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update subscription status (cancel/resume)"""
-    from datetime import datetime, timedelta
-    
-    if subscription_data.subscription_status.value == "cancelled":
-        # Cancel subscription
-        current_user.subscription_status = subscription_data.subscription_status
-        # Keep access until expiration date
-    elif subscription_data.subscription_status.value == "active":
-        # Activate subscription
-        current_user.subscription_status = subscription_data.subscription_status
-        if not current_user.subscription_expires_at:
-            # Set expiration to 30 days from now
-            current_user.subscription_expires_at = datetime.utcnow() + timedelta(days=30)
-    else:
-        current_user.subscription_status = subscription_data.subscription_status
-    
-    db.commit()
-    db.refresh(current_user)
-    
+    from datetime import timedelta
+
+    values = {"subscription_status": subscription_data.subscription_status}
+    if (subscription_data.subscription_status.value == "active"
+            and not current_user.subscription_expires_at):
+        # Set expiration to 30 days from now
+        values["subscription_expires_at"] = utcnow() + timedelta(days=30)
+
+    result = await db.execute(
+        update(User)
+        .where(User.id == current_user.id)
+        .values(**values)
+        .returning(User.subscription_status, User.subscription_expires_at)
+    )
+    row = result.one()
+    await db.commit()
+
     return {
-        "subscription_status": current_user.subscription_status,
-        "subscription_expires_at": current_user.subscription_expires_at
+        "subscription_status": row.subscription_status,
+        "subscription_expires_at": row.subscription_expires_at
     }
 
 
 @router.delete("/account", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_account(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Soft delete user account"""
-    from datetime import datetime
-    
-    current_user.deleted_at = datetime.utcnow()
+    current_user.deleted_at = utcnow()
     current_user.is_active = False
-    db.commit()
-    
-    return None
+    await db.commit()
 
+    await redis_client.delete(_prefs_cache_key(current_user.id))
+    return None
@@ -0,0 +1,80 @@
+"""
+Webhook endpoints for push-based ingestion
+"""
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timezone
+import orjson
+from app.core.database import get_db
+from app.models.data_source import DataSource, SourceType
+from app.models.content import ContentItem, ContentRaw, ContentType
+
+router = APIRouter()
+
+
+@router.post("/telegram/{secret}")
+async def telegram_webhook(
+    secret: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """Receive a pushed Telegram update.
+
+    Push вместо опроса getUpdates: ноль API-вызовов в простое, задержка
+    доставки сообщения — один RTT вместо интервала поллинга. Секрет в пути
+    выдается при подключении бота и хранится в settings источника.
+    """
+    result = await db.execute(
+        select(DataSource).where(
+            DataSource.source_type == SourceType.TELEGRAM,
+            DataSource.settings["webhook_secret"].astext == secret,
+            DataSource.is_active == True
+        )
+    )
+    source = result.scalar_one_or_none()
+    if source is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown webhook"
+        )
+
+    update = orjson.loads(await request.body())
+    message = update.get("message") or update.get("channel_post") or {}
+    if not message:
+        return {"ok": True}
+
+    external_id = str(message.get("message_id", ""))
+    existing = await db.execute(
+        select(ContentItem.id).where(
+            ContentItem.source_id == source.id,
+            ContentItem.external_id == external_id
+        )
+    )
+    if existing.scalar_one_or_none() is not None:
+        return {"ok": True}
+
+    message_date = message.get("date")
+    published_at = (
+        datetime.fromtimestamp(message_date, tz=timezone.utc) if message_date
+        else datetime.utcnow()
+    )
+
+    # Та же раскладка message -> ContentItem, что и в sync_telegram_source
+    item = ContentItem(
+        source_id=source.id,
+        external_id=external_id,
+        content_type=ContentType.MESSAGE,
+        text_content=message.get("text", "") or message.get("caption", ""),
+        author=message.get("from", {}).get("username", ""),
+        published_at=published_at,
+        item_metadata={
+            "chat_id": str(message.get("chat", {}).get("id", "")),
+            "chat_type": message.get("chat", {}).get("type", ""),
+            "message_type": message.get("message_type", "text")
+        },
+        raw=ContentRaw(raw_data=message)
+    )
+    db.add(item)
+    await db.commit()
+    return {"ok": True}
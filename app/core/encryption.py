@@ -1,27 +1,59 @@
 """
 Encryption utilities for storing OAuth credentials
 """
-from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from functools import lru_cache
 from app.core.config import settings
 import base64
 import hashlib
+import os
+import orjson
+
 
 # Generate encryption key from SECRET_KEY
+@lru_cache(maxsize=1)
 def get_encryption_key() -> bytes:
-    """Generate encryption key from SECRET_KEY"""
-    key = hashlib.sha256(settings.SECRET_KEY.encode()).digest()
-    return base64.urlsafe_b64encode(key)
+    """Generate encryption key from SECRET_KEY (derived once per process)"""
+    return hashlib.sha256(settings.SECRET_KEY.encode()).digest()
+
+
+# AESGCM кэширует key schedule один раз; OpenSSL под капотом использует
+# AES-NI/CLMUL, так что шифрование не упирается в CPU на каждом запросе
+_aesgcm = AESGCM(get_encryption_key())
+
+_NONCE_SIZE = 12  # Стандартный nonce для GCM
+
 
+def _encrypt_bytes(plaintext: bytes) -> str:
+    nonce = os.urandom(_NONCE_SIZE)
+    ciphertext = _aesgcm.encrypt(nonce, plaintext, None)
+    return base64.urlsafe_b64encode(nonce + ciphertext).decode()
 
-_fernet = Fernet(get_encryption_key())
+
+# Кэш по строке шифртекста: AES-GCM детерминирован для одного и того же
+# blob'а, а blob меняется только при пере-шифровании credentials. Повторные
+# обращения к одному источнику в рамках воркера не платят за base64 + AES
+@lru_cache(maxsize=1024)
+def _decrypt_bytes(encrypted_data: str) -> bytes:
+    raw = base64.urlsafe_b64decode(encrypted_data.encode())
+    return _aesgcm.decrypt(raw[:_NONCE_SIZE], raw[_NONCE_SIZE:], None)
 
 
 def encrypt_data(data: str) -> str:
-    """Encrypt sensitive data"""
-    return _fernet.encrypt(data.encode()).decode()
+    """Encrypt sensitive data (AES-256-GCM, base64url(nonce || ciphertext))"""
+    return _encrypt_bytes(data.encode())
 
 
 def decrypt_data(encrypted_data: str) -> str:
     """Decrypt sensitive data"""
-    return _fernet.decrypt(encrypted_data.encode()).decode()
+    return _decrypt_bytes(encrypted_data).decode()
+
+
+def encrypt_credentials(credentials: dict) -> dict:
+    """Encrypt a credentials dict as a single blob in one pass"""
+    return {"enc": _encrypt_bytes(orjson.dumps(credentials))}
+
 
+def decrypt_credentials(credentials: dict) -> dict:
+    """Decrypt a credentials dict produced by encrypt_credentials"""
+    return orjson.loads(_decrypt_bytes(credentials["enc"]))
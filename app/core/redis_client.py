@@ -0,0 +1,7 @@
+"""
+Shared Redis client for short-lived server-side state (OAuth state, caches)
+"""
+import redis.asyncio as redis
+from app.core.config import settings
+
+redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
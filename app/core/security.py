@@ -3,11 +3,20 @@ Security utilities: password hashing, JWT tokens
 """
 from datetime import datetime, timedelta
 from typing import Optional
+import hmac
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+# Хэш-заглушка, вычисляется один раз при импорте. Используется в login для
+# несуществующих пользователей, чтобы время ответа не выдавало наличие аккаунта.
+DUMMY_PASSWORD_HASH = pwd_context.hash("not-a-real-password")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -20,6 +29,15 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def secure_compare(a: str, b: str) -> bool:
+    """Constant-time comparison for tokens, OAuth state and other secrets.
+
+    Обычный `==` выходит на первом несовпавшем байте — по времени ответа
+    можно подбирать значение побайтово.
+    """
+    return hmac.compare_digest(a.encode(), b.encode())
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
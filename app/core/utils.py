@@ -0,0 +1,9 @@
+"""
+Small shared utilities
+"""
+from datetime import datetime, timezone
+
+
+def utcnow() -> datetime:
+    """Timezone-aware UTC now — datetime.utcnow() наивный и зависит от TZ процесса"""
+    return datetime.now(tz=timezone.utc)
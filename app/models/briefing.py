@@ -1,11 +1,10 @@
 """
 Briefing models
 """
-from sqlalchemy import Column, String, Text, Date, DateTime, ForeignKey, Enum as SQLEnum, Integer, UniqueConstraint
+from sqlalchemy import CheckConstraint, Column, String, Text, Date, DateTime, ForeignKey, Integer, UniqueConstraint, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-import uuid
 import enum
 from app.core.database import Base
 
@@ -21,10 +20,12 @@ class BriefingStatus(str, enum.Enum):
 class Briefing(Base):
     __tablename__ = "briefings"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     date = Column(Date, nullable=False)
-    status = Column(SQLEnum(BriefingStatus), default=BriefingStatus.PENDING, index=True)
+    # Обычный VARCHAR вместо Postgres ENUM: нет Python-коэрции на каждую
+    # строку и ALTER TYPE при изменении набора значений
+    status = Column(String(20), default=BriefingStatus.PENDING.value, index=True)
     text_summary = Column(Text)
     audio_file_url = Column(String(1000))
     audio_duration_seconds = Column(Integer)
@@ -40,13 +41,17 @@ class Briefing(Base):
 
     __table_args__ = (
         UniqueConstraint("user_id", "date", name="uq_briefing_user_date"),
+        CheckConstraint(
+            "status IN ('pending','generating','ready','delivered','failed')",
+            name="ck_briefings_status"
+        ),
     )
 
 
 class BriefingContent(Base):
     __tablename__ = "briefing_content"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     briefing_id = Column(UUID(as_uuid=True), ForeignKey("briefings.id", ondelete="CASCADE"), nullable=False, index=True)
     content_id = Column(UUID(as_uuid=True), ForeignKey("content_items.id", ondelete="CASCADE"), nullable=False)
     order = Column(Integer, nullable=False)
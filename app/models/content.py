@@ -1,11 +1,10 @@
 """
 Content models
 """
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Enum as SQLEnum, Float, ARRAY, UniqueConstraint
+from sqlalchemy import CheckConstraint, Column, Index, String, Text, DateTime, ForeignKey, Float, ARRAY, UniqueConstraint, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-import uuid
 import enum
 from app.core.database import Base
 
@@ -29,35 +28,74 @@ class CategoryType(str, enum.Enum):
 class ContentItem(Base):
     __tablename__ = "content_items"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    source_id = Column(UUID(as_uuid=True), ForeignKey("data_sources.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    # Отдельный индекс по source_id не нужен — его покрывает составной
+    # idx_content_src_pub ниже
+    source_id = Column(UUID(as_uuid=True), ForeignKey("data_sources.id", ondelete="CASCADE"), nullable=False)
     external_id = Column(String(255), nullable=False)
-    content_type = Column(SQLEnum(ContentType), nullable=False)
+    content_type = Column(String(20), nullable=False)
     title = Column(String(500))
     text_content = Column(Text)
     url = Column(String(1000))
     author = Column(String(255))
     published_at = Column(DateTime(timezone=True), nullable=False, index=True)
     item_metadata = Column("metadata", JSONB)  # В БД колонка называется "metadata", в коде используем item_metadata
-    raw_data = Column(JSONB)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
     # Relationships
     source = relationship("DataSource", back_populates="content_items")
     classification = relationship("ContentClassification", back_populates="content", uselist=False, cascade="all, delete-orphan")
     briefing_content = relationship("BriefingContent", back_populates="content", cascade="all, delete-orphan")
+    # lazy="noload": сырые данные не тянутся при сканах, только явным запросом
+    raw = relationship("ContentRaw", back_populates="content", uselist=False,
+                       lazy="noload", cascade="all, delete-orphan")
 
+    from sqlalchemy import Index
     __table_args__ = (
         UniqueConstraint("source_id", "external_id", name="uq_content_source_external"),
+        CheckConstraint(
+            "content_type IN ('post','article','message','notification')",
+            name="ck_content_items_type"
+        ),
+        # BRIN на порядки меньше B-tree для append-only временных данных;
+        # 24-часовой скан читает только последние блоки
+        Index("idx_content_published_brin", "published_at", postgresql_using="brin"),
     )
 
 
+class ContentRaw(Base):
+    """Сырые данные провайдера, вынесенные из горячей таблицы.
+
+    Горячий скан content_items не detoast'ит JSONB-блобы — они читаются
+    только когда нужен оригинальный payload.
+    """
+    __tablename__ = "content_items_raw"
+
+    content_id = Column(UUID(as_uuid=True), ForeignKey("content_items.id", ondelete="CASCADE"), primary_key=True)
+    raw_data = Column(JSONB)
+
+    content = relationship("ContentItem", back_populates="raw")
+
+
+# Покрывающий индекс под горячий запрос отбора контента: фильтр
+# source_id + published_at >= cutoff, DESC совпадает с ORDER BY, а INCLUDE
+# позволяет index-only scan без похода в heap за title. text_content сюда
+# нельзя: btree-кортеж ограничен ~2.7 КБ, длинная статья валила бы INSERT —
+# тело пусть добирается из heap
+Index(
+    "idx_content_src_pub",
+    ContentItem.source_id,
+    ContentItem.published_at.desc(),
+    postgresql_include=["title"],
+)
+
+
 class ContentClassification(Base):
     __tablename__ = "content_classifications"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     content_id = Column(UUID(as_uuid=True), ForeignKey("content_items.id", ondelete="CASCADE"), nullable=False, unique=True)
-    category = Column(SQLEnum(CategoryType), nullable=False, index=True)
+    category = Column(String(20), nullable=False, index=True)
     relevance_score = Column(Float, nullable=False)
     importance_score = Column(Float, nullable=False)
     social_score = Column(Float, nullable=False)
@@ -72,5 +110,9 @@ class ContentClassification(Base):
     from sqlalchemy import Index
     __table_args__ = (
         Index("idx_relevance_importance", "relevance_score", "importance_score"),
+        CheckConstraint(
+            "category IN ('personal','work','hobby','news','important','other')",
+            name="ck_content_classifications_category"
+        ),
     )
 
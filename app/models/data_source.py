@@ -1,11 +1,11 @@
 """
 Data source model
 """
-from sqlalchemy import Column, String, Boolean, Integer, DateTime, ForeignKey, Enum as SQLEnum, JSON
+from sqlalchemy import CheckConstraint, Column, String, Boolean, Integer, DateTime, ForeignKey, JSON, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-import uuid
+from functools import cached_property
 import enum
 from app.core.database import Base
 
@@ -22,9 +22,9 @@ class SourceType(str, enum.Enum):
 class DataSource(Base):
     __tablename__ = "data_sources"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    source_type = Column(SQLEnum(SourceType), nullable=False)
+    source_type = Column(String(20), nullable=False)
     name = Column(String(255), nullable=False)
     credentials = Column(JSONB)  # Зашифрованные OAuth токены
     is_active = Column(Boolean, default=True)
@@ -34,8 +34,65 @@ class DataSource(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
+    @cached_property
+    def decrypted_credentials(self) -> dict:
+        """Расшифрованные OAuth-токены, считаются один раз на инстанс.
+
+        Sync-циклы обращаются к токенам по многу раз за прогон — AES-GCM
+        гоняется единожды, дальше отдается закэшированный dict.
+        """
+        from app.core.encryption import decrypt_credentials
+        return decrypt_credentials(self.credentials) if self.credentials else {}
+
     # Relationships
     user = relationship("User", back_populates="data_sources")
     content_items = relationship("ContentItem", back_populates="source", cascade="all, delete-orphan")
     sync_logs = relationship("SyncLog", back_populates="source", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        CheckConstraint(
+            "source_type IN ('twitter','facebook','instagram','telegram','rss','email')",
+            name="ck_data_sources_type"
+        ),
+    )
+
+
+# Составной индекс под фильтр OAuth callback'ов: user_id + source_type
+Index("idx_data_sources_user_type", DataSource.user_id, DataSource.source_type)
+
+# Под планировщик sync_all_sources: выборка "активные и просроченные"
+# идет по индексу, а не полным сканом таблицы
+Index("ix_ds_active_lastsync", DataSource.is_active, DataSource.last_sync_at)
+
+# Уникальные partial expression-индексы по JSONB settings: превращают поиск
+# существующего источника в index lookup и служат arbiter-индексами для
+# INSERT ... ON CONFLICT в OAuth callback'ах
+Index(
+    "idx_data_sources_twitter_uid",
+    DataSource.user_id,
+    DataSource.settings["twitter_user_id"].astext,
+    unique=True,
+    postgresql_where=DataSource.source_type == SourceType.TWITTER,
+)
+Index(
+    "idx_data_sources_facebook_uid",
+    DataSource.user_id,
+    DataSource.settings["facebook_user_id"].astext,
+    unique=True,
+    postgresql_where=DataSource.source_type == SourceType.FACEBOOK,
+)
+Index(
+    "idx_data_sources_instagram_uid",
+    DataSource.user_id,
+    DataSource.settings["user_id"].astext,
+    unique=True,
+    postgresql_where=DataSource.source_type == SourceType.INSTAGRAM,
+)
+Index(
+    "idx_data_sources_telegram_bot_id",
+    DataSource.user_id,
+    DataSource.settings["bot_id"].astext,
+    unique=True,
+    postgresql_where=DataSource.source_type == SourceType.TELEGRAM,
+)
+
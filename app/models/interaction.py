@@ -1,11 +1,10 @@
 """
 User interaction model
 """
-from sqlalchemy import Column, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import CheckConstraint, Column, DateTime, ForeignKey, String, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-import uuid
 import enum
 from app.core.database import Base
 
@@ -21,11 +20,11 @@ class InteractionType(str, enum.Enum):
 class UserInteraction(Base):
     __tablename__ = "user_interactions"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     briefing_id = Column(UUID(as_uuid=True), ForeignKey("briefings.id", ondelete="SET NULL"))
     content_id = Column(UUID(as_uuid=True), ForeignKey("content_items.id", ondelete="SET NULL"))
-    interaction_type = Column(SQLEnum(InteractionType), nullable=False)
+    interaction_type = Column(String(20), nullable=False)
     timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
     # Relationships
@@ -33,3 +32,10 @@ class UserInteraction(Base):
     briefing = relationship("Briefing")
     content = relationship("ContentItem")
 
+    __table_args__ = (
+        CheckConstraint(
+            "interaction_type IN ('played','skipped','liked','disliked','shared')",
+            name="ck_user_interactions_type"
+        ),
+    )
+
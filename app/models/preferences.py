@@ -1,18 +1,17 @@
 """
 User preferences model
 """
-from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, ARRAY
+from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, ARRAY, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-import uuid
 from app.core.database import Base
 
 
 class UserPreferences(Base):
     __tablename__ = "user_preferences"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, unique=True, index=True)
     categories_priority = Column(JSONB)
     topics_interest = Column(ARRAY(String))
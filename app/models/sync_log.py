@@ -1,11 +1,10 @@
 """
 Sync log model
 """
-from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, Enum as SQLEnum, Text
+from sqlalchemy import CheckConstraint, Column, String, Integer, Float, DateTime, ForeignKey, Text, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-import uuid
 import enum
 from app.core.database import Base
 
@@ -19,9 +18,9 @@ class SyncStatus(str, enum.Enum):
 class SyncLog(Base):
     __tablename__ = "sync_logs"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     source_id = Column(UUID(as_uuid=True), ForeignKey("data_sources.id", ondelete="CASCADE"), nullable=False, index=True)
-    status = Column(SQLEnum(SyncStatus), nullable=False, index=True)
+    status = Column(String(20), nullable=False, index=True)
     items_fetched = Column(Integer, default=0)
     items_new = Column(Integer, default=0)
     items_updated = Column(Integer, default=0)
@@ -33,3 +32,10 @@ class SyncLog(Base):
     # Relationships
     source = relationship("DataSource", back_populates="sync_logs")
 
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('success','failed','partial')",
+            name="ck_sync_logs_status"
+        ),
+    )
+
@@ -1,12 +1,12 @@
 """
 User model
 """
-from sqlalchemy import Column, String, Boolean, Time, DateTime, Enum as SQLEnum
+from sqlalchemy import CheckConstraint, Column, String, Boolean, Time, DateTime, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-import uuid
 import enum
+from datetime import time
 from app.core.database import Base
 
 
@@ -20,14 +20,15 @@ class SubscriptionStatus(str, enum.Enum):
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     email = Column(String(255), unique=True, nullable=False, index=True)
     password_hash = Column(String(255), nullable=False)
     full_name = Column(String(255))
     timezone = Column(String(50), default="UTC")
-    briefing_time = Column(Time, default="08:00")
+    # asyncpg принимает только datetime.time, строку psycopg2 прощал
+    briefing_time = Column(Time, default=time(8, 0))
     is_active = Column(Boolean, default=True)
-    subscription_status = Column(SQLEnum(SubscriptionStatus), default=SubscriptionStatus.FREE)
+    subscription_status = Column(String(20), default=SubscriptionStatus.FREE.value)
     subscription_expires_at = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -39,3 +40,10 @@ class User(Base):
     preferences = relationship("UserPreferences", back_populates="user", uselist=False, cascade="all, delete-orphan")
     interactions = relationship("UserInteraction", back_populates="user", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        CheckConstraint(
+            "subscription_status IN ('free','trial','active','cancelled')",
+            name="ck_users_subscription_status"
+        ),
+    )
+
@@ -1,7 +1,7 @@
 """
 Briefing schemas
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List
 from datetime import datetime, date
 from app.models.briefing import BriefingStatus
@@ -20,8 +20,7 @@ class BriefingResponse(BaseModel):
     delivered_at: Optional[datetime]
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class BriefingContentResponse(BaseModel):
@@ -32,8 +31,7 @@ class BriefingContentResponse(BaseModel):
     content_title: Optional[str]
     content_text: Optional[str]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class BriefingDetailResponse(BriefingResponse):
@@ -1,7 +1,7 @@
 """
 Data source schemas
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, Dict, Any
 from datetime import datetime
 from app.models.data_source import SourceType
@@ -25,8 +25,7 @@ class DataSourceResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class TwitterOAuthInit(BaseModel):
@@ -1,40 +1,130 @@
 """
 Briefing generation service
 """
+import asyncio
+import io
+from functools import lru_cache
 from typing import List, Dict
 from datetime import datetime, date, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, func, select, text
+from sqlalchemy.orm import Session, contains_eager, load_only
 from app.models.content import ContentItem, ContentClassification
 from app.models.briefing import Briefing, BriefingContent, BriefingStatus
+from app.models.data_source import DataSource
+from app.models.preferences import UserPreferences
 from app.models.user import User
 from app.core.config import settings
+from app.services.http_client import shared_async_client
 import openai
 import json
 
 
+@lru_cache(maxsize=1)
+def _content_selection_stmt():
+    """Горячий SELECT отбора контента, собранный один раз на процесс.
+
+    Форма запроса фиксированная, меняются только bind-параметры — кэш
+    компиляции SQLAlchemy и серверные prepared statement'ы переиспользуют
+    уже готовый SQL/план для всех пользователей.
+    """
+    min_relevance = func.coalesce(
+        select(UserPreferences.min_relevance_score)
+        .where(UserPreferences.user_id == bindparam("uid"))
+        .scalar_subquery(),
+        settings.MIN_RELEVANCE_SCORE
+    )
+    return (
+        select(ContentItem)
+        .join(ContentClassification,
+              ContentClassification.content_id == ContentItem.id)
+        .join(DataSource, DataSource.id == ContentItem.source_id)
+        .where(
+            DataSource.user_id == bindparam("uid"),
+            DataSource.is_active == True,
+            # Срез "за последние 24 часа" считает сам Postgres: нет лишнего
+            # bind-параметра, план и время берутся на стороне БД
+            ContentItem.published_at >= func.now() - text("interval '24 hours'"),
+            ContentClassification.relevance_score >= min_relevance
+        )
+        .options(
+            # Только нужные колонки: JSONB-метаданные и прочий балласт
+            # не ездят по сети и не проходят гидратацию
+            load_only(ContentItem.id, ContentItem.title,
+                      ContentItem.text_content, ContentItem.published_at),
+            contains_eager(ContentItem.classification).load_only(
+                ContentClassification.relevance_score,
+                ContentClassification.importance_score,
+                ContentClassification.category
+            )
+        )
+        .order_by(
+            ContentClassification.relevance_score.desc(),
+            ContentClassification.importance_score.desc()
+        )
+        .limit(bindparam("max_items"))
+    )
+
+
+@lru_cache(maxsize=1)
+def _content_snippet_stmt():
+    """Проекция (id, snippet, relevance_score) для промпта.
+
+    Обрезка и COALESCE делаются на стороне БД: по сети идет максимум
+    200 символов на элемент вместо полного текста, а строки не проходят
+    ORM-гидратацию.
+    """
+    min_relevance = func.coalesce(
+        select(UserPreferences.min_relevance_score)
+        .where(UserPreferences.user_id == bindparam("uid"))
+        .scalar_subquery(),
+        settings.MIN_RELEVANCE_SCORE
+    )
+    return (
+        select(
+            ContentItem.id,
+            func.left(
+                func.coalesce(ContentItem.text_content, ContentItem.title, ""),
+                200
+            ).label("snippet"),
+            ContentClassification.relevance_score
+        )
+        .join(ContentClassification,
+              ContentClassification.content_id == ContentItem.id)
+        .join(DataSource, DataSource.id == ContentItem.source_id)
+        .where(
+            DataSource.user_id == bindparam("uid"),
+            DataSource.is_active == True,
+            ContentItem.published_at >= func.now() - text("interval '24 hours'"),
+            ContentClassification.relevance_score >= min_relevance
+        )
+        .order_by(
+            ContentClassification.relevance_score.desc(),
+            ContentClassification.importance_score.desc()
+        )
+        .limit(bindparam("max_items"))
+    )
+
+
 class BriefingGenerator:
     """Generate text summaries and audio briefings"""
-    
+
+    # Ограничивает одновременные LLM/TTS-пайплайны на процесс, чтобы батч
+    # утренних брифингов не упирался в rate limit'ы API
+    _llm_sem = asyncio.Semaphore(settings.LLM_CONCURRENCY)
+
     def __init__(self, openai_client):
         self.openai_client = openai_client
         self.max_duration_seconds = settings.BRIEFING_DURATION_SECONDS
-    
-    async def generate_text_summary(
-        self,
-        content_items: List[ContentItem],
-        user: User
-    ) -> str:
-        """Generate text summary from content items"""
-        # Prepare content for summarization
-        content_texts = []
-        for item in content_items:
-            text = item.text_content or item.title or ""
-            if text:
-                content_texts.append(f"- {text[:200]}")
-        
-        content_summary = "\n".join(content_texts[:20])  # Limit to 20 items
-        
-        prompt = f"""Создай краткий утренний дайджест на основе следующего контента.
+
+    _SYSTEM_PROMPT = "Ты создаешь утренние дайджесты. Будь кратким и информативным."
+
+    def _build_prompt(self, snippets: List[str]) -> str:
+        """Build the summarization prompt from content snippets"""
+        content_summary = "\n".join(
+            f"- {s}" for s in snippets[:20] if s  # Limit to 20 items
+        )
+
+        return f"""Создай краткий утренний дайджест на основе следующего контента.
 Дайджест должен быть рассчитан на {self.max_duration_seconds} секунд чтения (примерно 300-400 слов).
 Будь кратким, информативным и структурированным.
 
@@ -49,33 +139,113 @@ class BriefingGenerator:
 
 Язык: русский
 Стиль: дружелюбный, профессиональный"""
-        
+
+    async def generate_text_summary(
+        self,
+        snippets: List[str],
+        user: User
+    ) -> str:
+        """Generate text summary from content snippets.
+
+        snippets — уже обрезанные до 200 символов строки из
+        select_content_snippets_for_briefing, полные тексты сюда не попадают.
+        """
         try:
             response = await self.openai_client.chat.completions.create(
                 model=settings.OPENAI_MODEL,
                 messages=[
-                    {"role": "system", "content": "Ты создаешь утренние дайджесты. Будь кратким и информативным."},
-                    {"role": "user", "content": prompt}
+                    {"role": "system", "content": self._SYSTEM_PROMPT},
+                    {"role": "user", "content": self._build_prompt(snippets)}
                 ],
                 temperature=0.7,
                 max_tokens=800
             )
-            
+
             summary = response.choices[0].message.content
             return summary
         except Exception as e:
             # Fallback summary
-            return self._create_fallback_summary(content_items)
-    
-    def _create_fallback_summary(self, content_items: List[ContentItem]) -> str:
+            return self._create_fallback_summary(snippets)
+
+    async def generate_summary_and_audio(
+        self,
+        snippets: List[str],
+        user: User,
+        audio_path: str,
+        voice_id: str = None
+    ) -> str:
+        """Stream the summary from the LLM and pipeline TTS sentence-by-sentence.
+
+        Готовые предложения уходят в TTS, пока LLM еще дописывает текст —
+        стена времени приближается к max(LLM, TTS) вместо их суммы. Аудио
+        пишется в audio_path чанками по мере синтеза: полный MP3 никогда не
+        материализуется в памяти. Возвращает text_summary.
+        """
+        async with self._llm_sem:
+            queue: asyncio.Queue = asyncio.Queue()
+
+            async def _synthesize() -> None:
+                with open(audio_path, "wb") as f:
+                    while True:
+                        sentence = await queue.get()
+                        if sentence is None:
+                            break
+                        await self._stream_tts_to(sentence, f, voice_id)
+
+            tts_task = asyncio.create_task(_synthesize())
+            text_parts: List[str] = []
+            pending = ""
+
+            try:
+                stream = await self.openai_client.chat.completions.create(
+                    model=settings.OPENAI_MODEL,
+                    messages=[
+                        {"role": "system", "content": self._SYSTEM_PROMPT},
+                        {"role": "user", "content": self._build_prompt(snippets)}
+                    ],
+                    temperature=0.7,
+                    max_tokens=800,
+                    stream=True
+                )
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    pending += delta
+                    # В TTS уходят только завершенные предложения
+                    cut = max(pending.rfind("."), pending.rfind("!"),
+                              pending.rfind("?"), pending.rfind("\n"))
+                    if cut != -1:
+                        sentence = pending[:cut + 1]
+                        pending = pending[cut + 1:]
+                        text_parts.append(sentence)
+                        await queue.put(sentence)
+                if pending.strip():
+                    text_parts.append(pending)
+                    await queue.put(pending)
+                await queue.put(None)
+                await tts_task
+                return "".join(text_parts)
+            except Exception:
+                # Fallback: завершаем конвейер и озвучиваем простой дайджест целиком
+                await queue.put(None)
+                await tts_task
+                summary = self._create_fallback_summary(snippets)
+                with open(audio_path, "wb") as f:
+                    await self._stream_tts_to(summary, f, voice_id)
+                return summary
+
+    def _create_fallback_summary(self, snippets: List[str]) -> str:
         """Create a simple fallback summary"""
-        summary_parts = ["Доброе утро! Вот ваш дайджест на сегодня:\n"]
-        
-        for i, item in enumerate(content_items[:10], 1):
-            text = (item.text_content or item.title or "")[:100]
-            summary_parts.append(f"{i}. {text}...")
-        
-        return "\n".join(summary_parts)
+        # StringIO пишет в один растущий буфер — без промежуточного списка
+        # и финальной join-аллокации
+        buf = io.StringIO()
+        buf.write("Доброе утро! Вот ваш дайджест на сегодня:\n")
+
+        for i, snippet in enumerate(snippets[:10], 1):
+            buf.write(f"\n{i}. {snippet[:100]}...")
+
+        return buf.getvalue()
     
     async def generate_audio(
         self,
@@ -83,8 +253,6 @@ class BriefingGenerator:
         voice_id: str = None
     ) -> bytes:
         """Generate audio from text using TTS"""
-        from app.core.config import settings
-        
         # Try ElevenLabs first, fallback to OpenAI TTS
         if settings.ELEVENLABS_API_KEY:
             try:
@@ -97,16 +265,18 @@ class BriefingGenerator:
     
     async def _generate_with_elevenlabs(self, text: str, voice_id: str) -> bytes:
         """Generate audio using ElevenLabs"""
-        from elevenlabs import generate, set_api_key
-        from app.core.config import settings
-        
-        set_api_key(settings.ELEVENLABS_API_KEY)
-        audio = generate(
-            text=text,
-            voice=voice_id,
-            model="eleven_multilingual_v2"
+        # Прямой вызов API через общий клиент: SDK-обертка поднимала
+        # новую HTTP-сессию (и TLS handshake) на каждый запрос
+        response = await shared_async_client.post(
+            f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}",
+            headers={"xi-api-key": settings.ELEVENLABS_API_KEY},
+            json={
+                "text": text,
+                "model_id": "eleven_multilingual_v2"
+            }
         )
-        return audio
+        response.raise_for_status()
+        return response.content
     
     async def _generate_with_openai(self, text: str) -> bytes:
         """Generate audio using OpenAI TTS"""
@@ -116,7 +286,70 @@ class BriefingGenerator:
             input=text
         )
         return response.content
+
+    async def _stream_tts_to(self, text: str, fileobj, voice_id: str = None) -> None:
+        """Stream TTS audio into fileobj: ElevenLabs first, OpenAI fallback"""
+        if settings.ELEVENLABS_API_KEY:
+            try:
+                await self._stream_elevenlabs_tts_to(
+                    text, fileobj, voice_id or settings.ELEVENLABS_VOICE_ID
+                )
+                return
+            except Exception as e:
+                print(f"ElevenLabs TTS failed: {e}, falling back to OpenAI")
+        await self._stream_openai_tts_to(text, fileobj)
+
+    async def _stream_elevenlabs_tts_to(self, text: str, fileobj, voice_id: str) -> None:
+        """Stream ElevenLabs TTS chunks straight into fileobj.
+
+        Тело ответа не буферизуется: чанки пишутся на диск по мере
+        прихода, как и в OpenAI-пути.
+        """
+        async with shared_async_client.stream(
+            "POST",
+            f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}",
+            headers={"xi-api-key": settings.ELEVENLABS_API_KEY},
+            json={
+                "text": text,
+                "model_id": "eleven_multilingual_v2"
+            }
+        ) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(8192):
+                fileobj.write(chunk)
+
+    async def _stream_openai_tts_to(self, text: str, fileobj) -> None:
+        """Stream OpenAI TTS chunks straight into fileobj.
+
+        В памяти держится максимум один 8 КБ чанк, а не весь MP3 —
+        утренний fan-out не раздувает RSS пропорционально числу брифингов.
+        """
+        async with self.openai_client.audio.speech.with_streaming_response.create(
+            model="tts-1",
+            voice="alloy",
+            input=text
+        ) as response:
+            async for chunk in response.iter_bytes(8192):
+                fileobj.write(chunk)
     
+    def select_content_snippets_for_briefing(
+        self,
+        db: Session,
+        user: User,
+        max_items: int = None
+    ) -> List:
+        """Select (id, snippet, relevance_score) rows for the briefing prompt.
+
+        Core-проекция вместо полных ORM-сущностей — этого достаточно и для
+        промпта, и для записи BriefingContent.
+        """
+        max_items = max_items or settings.MAX_CONTENT_ITEMS_PER_BRIEFING
+
+        return db.execute(
+            _content_snippet_stmt(),
+            {"uid": user.id, "max_items": max_items}
+        ).all()
+
     def select_content_for_briefing(
         self,
         db: Session,
@@ -124,45 +357,14 @@ class BriefingGenerator:
         max_items: int = None
     ) -> List[ContentItem]:
         """Select most relevant content items for briefing"""
-        from app.models.data_source import DataSource
-        from app.models.user import UserPreferences
-        
         max_items = max_items or settings.MAX_CONTENT_ITEMS_PER_BRIEFING
-        
-        # Get user preferences
-        preferences = db.query(UserPreferences).filter(
-            UserPreferences.user_id == user.id
-        ).first()
-        
-        min_relevance = preferences.min_relevance_score if preferences else settings.MIN_RELEVANCE_SCORE
-        
-        # Get content from last 24 hours
-        cutoff_time = datetime.utcnow() - timedelta(hours=24)
-        
-        # Get active sources
-        sources = db.query(DataSource).filter(
-            DataSource.user_id == user.id,
-            DataSource.is_active == True
-        ).all()
-        
-        source_ids = [str(s.id) for s in sources]
-        
-        # Get classified content
-        content = db.query(ContentItem).join(ContentClassification).filter(
-            ContentItem.source_id.in_(source_ids),
-            ContentItem.published_at >= cutoff_time,
-            ContentClassification.relevance_score >= min_relevance
-        ).order_by(
-            ContentClassification.relevance_score.desc(),
-            ContentClassification.importance_score.desc()
-        ).limit(max_items * 2).all()  # Get more, then filter
-        
-        # Filter and rank
-        ranked_content = []
-        for item in content:
-            if item.classification:
-                ranked_content.append(item)
-        
-        # Return top items
-        return ranked_content[:max_items]
+
+        # Один запрос вместо трех: источники через JOIN (UUID остаются
+        # нативными), min_relevance — коррелированный подзапрос, фильтр по
+        # relevance — в SQL, classification подгружается тем же JOIN'ом
+        # через contains_eager без ленивых дозапросов
+        return db.execute(
+            _content_selection_stmt(),
+            {"uid": user.id, "max_items": max_items}
+        ).scalars().all()
 
@@ -1,53 +1,151 @@
 """
 Content classification service
 """
-from typing import Dict, List
+from typing import Dict, List, Optional
+from collections import OrderedDict
+from operator import itemgetter
 from app.models.content import ContentItem, CategoryType
+import asyncio
+import hashlib
+import heapq
+import msgspec
+import orjson
 import re
 
+# Компилируется один раз при импорте, а не на каждый вызов _extract_topics
+_TOPIC_RE = re.compile(r'\b[а-яё]{4,}\b')
+
+try:
+    # Ахо-Корасик: один линейный проход по тексту вместо ~40 substring-сканов
+    import ahocorasick
+except ImportError:  # pragma: no cover
+    ahocorasick = None
+
+
+class ClassificationResult(msgspec.Struct, frozen=True):
+    """Результат классификации: слотовая C-структура вместо dict с шестью
+    ключами — меньше памяти на элемент и доступ по атрибуту без хэш-лукапа"""
+    category: CategoryType
+    relevance_score: float
+    importance_score: float
+    social_score: float
+    personal_score: float
+    topics: List[str] = []
+
 
 class RuleBasedClassifier:
     """Rule-based content classifier"""
-    
+
     # Keywords for different categories
     WORK_KEYWORDS = [
         "работа", "проект", "дедлайн", "встреча", "коллега", "офис",
         "задача", "клиент", "бизнес", "компания", "стартап"
     ]
-    
+
     PERSONAL_KEYWORDS = [
         "семья", "друзья", "день рождения", "отпуск", "праздник",
         "личное", "дом", "родные"
     ]
-    
+
     HOBBY_KEYWORDS = [
         "хобби", "спорт", "музыка", "кино", "книга", "игра",
         "путешествие", "фото", "рисование"
     ]
-    
+
     NEWS_KEYWORDS = [
         "новость", "событие", "происшествие", "политика", "экономика",
         "технологии", "наука", "культура"
     ]
-    
+
     IMPORTANT_KEYWORDS = [
         "важно", "срочно", "критично", "внимание", "обязательно",
         "необходимо", "требуется"
     ]
-    
-    def classify(self, content: ContentItem) -> Dict:
+
+    CATEGORY_KEYWORDS = {
+        CategoryType.WORK: WORK_KEYWORDS,
+        CategoryType.PERSONAL: PERSONAL_KEYWORDS,
+        CategoryType.HOBBY: HOBBY_KEYWORDS,
+        CategoryType.NEWS: NEWS_KEYWORDS,
+        CategoryType.IMPORTANT: IMPORTANT_KEYWORDS,
+    }
+
+    # Автомат строится один раз на класс при первом обращении
+    _automaton = None
+
+    # Fallback без C-расширения: одна скомпилированная альтернация на
+    # категорию — скан делает C-движок re вместо N substring-проверок
+    _category_res = None
+
+    @classmethod
+    def _get_automaton(cls):
+        if cls._automaton is None and ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for category, keywords in cls.CATEGORY_KEYWORDS.items():
+                for keyword in keywords:
+                    automaton.add_word(keyword, (category, keyword))
+            automaton.make_automaton()
+            cls._automaton = automaton
+        return cls._automaton
+
+    @classmethod
+    def _get_category_res(cls) -> Dict[CategoryType, "re.Pattern"]:
+        if cls._category_res is None:
+            # Длинные ключи первыми, чтобы альтернация предпочитала их;
+            # без \b — семантика substring-поиска, как у автомата
+            cls._category_res = {
+                category: re.compile("|".join(
+                    map(re.escape, sorted(keywords, key=len, reverse=True))
+                ))
+                for category, keywords in cls.CATEGORY_KEYWORDS.items()
+            }
+        return cls._category_res
+
+    def _category_scores(self, parts: tuple) -> Dict[CategoryType, float]:
+        """Score all categories in a single pass over the text parts"""
+        automaton = self._get_automaton()
+        if automaton is None:
+            # Fallback: по одному C-скану на категорию, если pyahocorasick
+            # не установлен; считаем различные совпавшие ключи, как автомат
+            scores = {}
+            for category, pattern in self._get_category_res().items():
+                # После len/2 совпавших ключей min(...) уже клампится в 1.0 —
+                # остальные части текста сканировать бессмысленно
+                cap = len(self.CATEGORY_KEYWORDS[category]) / 2
+                found: set = set()
+                for part in parts:
+                    found.update(pattern.findall(part))
+                    if len(found) >= cap:
+                        break
+                scores[category] = min(
+                    len(found) / len(self.CATEGORY_KEYWORDS[category]) * 2.0, 1.0
+                )
+            return scores
+
+        matched: Dict[CategoryType, set] = {c: set() for c in self.CATEGORY_KEYWORDS}
+        for part in parts:
+            for _, (category, keyword) in automaton.iter(part):
+                matched[category].add(keyword)
+        # Доля совпавших различных ключей * 2, кламп в 1.0
+        return {
+            category: min(len(matched[category]) / len(keywords) * 2.0, 1.0)
+            for category, keywords in self.CATEGORY_KEYWORDS.items()
+        }
+
+    def classify(self, content: ContentItem) -> ClassificationResult:
         """Classify content item and return scores"""
-        text = (content.text_content or "").lower()
-        title = (content.title or "").lower()
-        full_text = f"{title} {text}"
-        
-        # Calculate scores for each category
-        work_score = self._calculate_score(full_text, self.WORK_KEYWORDS)
-        personal_score = self._calculate_score(full_text, self.PERSONAL_KEYWORDS)
-        hobby_score = self._calculate_score(full_text, self.HOBBY_KEYWORDS)
-        news_score = self._calculate_score(full_text, self.NEWS_KEYWORDS)
-        important_score = self._calculate_score(full_text, self.IMPORTANT_KEYWORDS)
-        
+        # Каждый .lower() аллоцирует копию строки — приводим регистр один раз
+        # и не склеиваем title+text: сканеры обходят части по отдельности
+        parts = ((content.title or "").lower(), (content.text_content or "").lower())
+
+        # Calculate scores for each category (один проход автомата)
+        category_scores = self._category_scores(parts)
+        work_score = category_scores[CategoryType.WORK]
+        personal_score = category_scores[CategoryType.PERSONAL]
+        hobby_score = category_scores[CategoryType.HOBBY]
+        news_score = category_scores[CategoryType.NEWS]
+        important_score = category_scores[CategoryType.IMPORTANT]
+
         # Determine category
         scores = {
             CategoryType.WORK: work_score,
@@ -70,19 +168,14 @@ class RuleBasedClassifier:
         # Personal score (mentions, location, etc.)
         personal_relevance = self._calculate_personal_score(content)
         
-        return {
-            "category": category,
-            "relevance_score": min(relevance_score, 1.0),
-            "importance_score": min(importance_score, 1.0),
-            "social_score": social_score,
-            "personal_score": personal_relevance,
-            "topics": self._extract_topics(full_text)
-        }
-    
-    def _calculate_score(self, text: str, keywords: List[str]) -> float:
-        """Calculate score based on keyword matches"""
-        matches = sum(1 for keyword in keywords if keyword in text)
-        return min(matches / len(keywords) * 2.0, 1.0) if keywords else 0.0
+        return ClassificationResult(
+            category=category,
+            relevance_score=min(relevance_score, 1.0),
+            importance_score=min(importance_score, 1.0),
+            social_score=social_score,
+            personal_score=personal_relevance,
+            topics=self._extract_topics(parts)
+        )
     
     def _calculate_social_score(self, metadata: Dict) -> float:
         """Calculate social score from likes, retweets, etc."""
@@ -101,29 +194,50 @@ class RuleBasedClassifier:
         # For now, return a base score
         return 0.3
     
-    def _extract_topics(self, text: str) -> List[str]:
-        """Extract topics/keywords from text"""
-        # Simple keyword extraction (can be enhanced with NLP)
-        words = re.findall(r'\b[а-яё]{4,}\b', text.lower())
-        # Return most common words (simplified)
-        from collections import Counter
-        common_words = Counter(words).most_common(5)
-        return [word for word, count in common_words]
+    def _extract_topics(self, parts: tuple) -> List[str]:
+        """Extract topics/keywords from text parts"""
+        # Simple keyword extraction (can be enhanced with NLP).
+        # Части уже в нижнем регистре (classify приводит до вызова)
+        counts: Dict[str, int] = {}
+        for part in parts:
+            for word in _TOPIC_RE.findall(part):
+                counts[word] = counts.get(word, 0) + 1
+        # nlargest держит кучу из 5 элементов вместо сортировки всего словаря
+        return [w for w, _ in heapq.nlargest(5, counts.items(), key=itemgetter(1))]
 
 
 class AIClassifier:
     """AI-powered classifier using OpenAI"""
-    
+
+    # Кэш процесса: ретвиты, кросспосты и повторяющиеся RSS-элементы с тем же
+    # заголовком и началом текста не порождают повторного запроса к OpenAI
+    # (~1с и деньги за вызов). LRU на 2048 записей.
+    _CACHE_MAX = 2048
+    _cache: "OrderedDict[str, ClassificationResult]" = OrderedDict()
+
     def __init__(self, openai_client):
         self.openai_client = openai_client
-    
-    async def classify(self, content: ContentItem, user_preferences: Dict = None) -> Dict:
+
+    @staticmethod
+    def _cache_key(title: str, text: str, user_preferences: Optional[Dict]) -> str:
+        prefs = orjson.dumps(user_preferences or {}, option=orjson.OPT_SORT_KEYS)
+        return hashlib.blake2b(
+            f"{title}|{text[:500]}|".encode() + prefs, digest_size=16
+        ).hexdigest()
+
+    async def classify(self, content: ContentItem,
+                       user_preferences: Dict = None) -> ClassificationResult:
         """Classify content using OpenAI"""
-        from app.models.content import CategoryType
-        
+
         text = content.text_content or ""
         title = content.title or ""
-        
+
+        cache_key = self._cache_key(title, text, user_preferences)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            return cached
+
         prompt = f"""Проанализируй следующий контент и определи его категорию, релевантность и важность.
 
 Заголовок: {title}
@@ -136,7 +250,7 @@ class AIClassifier:
 4. Социальная значимость (0.0-1.0): популярность, вирусность
 5. Личная значимость (0.0-1.0): упоминания друзей, личные связи
 
-Ответь в формате JSON:
+Ответь одним JSON-объектом:
 {{
     "category": "work",
     "relevance_score": 0.8,
@@ -153,23 +267,134 @@ class AIClassifier:
                     {"role": "system", "content": "Ты помощник для классификации контента. Отвечай только валидным JSON."},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.3,
+                # temperature=0: детерминированные ответы лучше кэшируются;
+                # json_object гарантирует валидный JSON без regex-починки
+                temperature=0,
+                response_format={"type": "json_object"},
                 max_tokens=200
             )
             
-            import json
-            result = json.loads(response.choices[0].message.content)
-            
-            return {
-                "category": CategoryType(result.get("category", "other")),
-                "relevance_score": float(result.get("relevance_score", 0.5)),
-                "importance_score": float(result.get("importance_score", 0.5)),
-                "social_score": float(result.get("social_score", 0.3)),
-                "personal_score": float(result.get("personal_score", 0.3)),
-                "topics": result.get("topics", [])
-            }
+            result = orjson.loads(response.choices[0].message.content)
+
+            classification = ClassificationResult(
+                category=CategoryType(result.get("category", "other")),
+                relevance_score=float(result.get("relevance_score", 0.5)),
+                importance_score=float(result.get("importance_score", 0.5)),
+                social_score=float(result.get("social_score", 0.3)),
+                personal_score=float(result.get("personal_score", 0.3)),
+                topics=result.get("topics", [])
+            )
+            # Кэшируются только удачные ответы модели — fallback не запоминаем
+            self._cache[cache_key] = classification
+            if len(self._cache) > self._CACHE_MAX:
+                self._cache.popitem(last=False)
+            return classification
         except Exception as e:
             # Fallback to rule-based if AI fails
             rule_classifier = RuleBasedClassifier()
             return rule_classifier.classify(content)
 
+    async def classify_batch(self, items: List[ContentItem],
+                             user_preferences: Dict = None,
+                             batch_size: int = 20) -> List[ClassificationResult]:
+        """Classify many items with one OpenAI call per batch.
+
+        N отдельных запросов к модели — это N round trip'ов и N копий
+        преамбулы промпта. Пачка из batch_size элементов уходит одним
+        вызовом, модель возвращает JSON-массив; кэш проверяется до
+        отправки, в запрос попадают только промахи.
+        """
+        results: List[Optional[ClassificationResult]] = [None] * len(items)
+        pending: List[int] = []
+        for idx, item in enumerate(items):
+            key = self._cache_key(item.title or "", item.text_content or "",
+                                  user_preferences)
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                results[idx] = cached
+            else:
+                pending.append(idx)
+
+        # Чанки уходят к OpenAI параллельно: wall-time определяется самым
+        # медленным чанком, а не суммой. Семафор ограничивает одновременные
+        # запросы ради rate limit'ов.
+        sem = asyncio.Semaphore(4)
+
+        async def run_chunk(chunk: List[int]) -> List[ClassificationResult]:
+            async with sem:
+                return await self._classify_chunk(
+                    [items[i] for i in chunk], user_preferences
+                )
+
+        chunks = [pending[start:start + batch_size]
+                  for start in range(0, len(pending), batch_size)]
+        for chunk, chunk_results in zip(chunks, await asyncio.gather(
+                *(run_chunk(chunk) for chunk in chunks))):
+            for i, classification in zip(chunk, chunk_results):
+                results[i] = classification
+
+        return results
+
+    async def _classify_chunk(self, items: List[ContentItem],
+                              user_preferences: Dict = None) -> List[ClassificationResult]:
+        """One OpenAI call for a chunk of items; rule-based on any failure"""
+        blocks = []
+        for number, item in enumerate(items, 1):
+            title = item.title or ""
+            text = (item.text_content or "")[:500]
+            blocks.append(f"Элемент {number}:\nЗаголовок: {title}\nТекст: {text}")
+
+        prompt = f"""Проанализируй следующие {len(items)} элементов контента и для каждого определи категорию, релевантность и важность.
+
+{chr(10).join(blocks)}
+
+Для каждого элемента определи:
+1. Категорию: personal, work, hobby, news, important, other
+2. Релевантность (0.0-1.0)
+3. Важность (0.0-1.0)
+4. Социальную значимость (0.0-1.0)
+5. Личную значимость (0.0-1.0)
+
+Ответь одним JSON-объектом с массивом из {len(items)} результатов в исходном порядке:
+{{"results": [{{"category": "work", "relevance_score": 0.8, "importance_score": 0.6, "social_score": 0.4, "personal_score": 0.3, "topics": ["тема1"]}}]}}"""
+
+        try:
+            response = await self.openai_client.chat.completions.create(
+                model="gpt-4-turbo-preview",
+                messages=[
+                    {"role": "system", "content": "Ты помощник для классификации контента. Отвечай только валидным JSON."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0,
+                response_format={"type": "json_object"},
+                max_tokens=200 * len(items)
+            )
+
+            parsed = orjson.loads(response.choices[0].message.content).get("results")
+            if not isinstance(parsed, list) or len(parsed) != len(items):
+                raise ValueError(
+                    f"Expected {len(items)} results, got {parsed!r:.200}"
+                )
+
+            chunk_results = []
+            for item, result in zip(items, parsed):
+                classification = ClassificationResult(
+                    category=CategoryType(result.get("category", "other")),
+                    relevance_score=float(result.get("relevance_score", 0.5)),
+                    importance_score=float(result.get("importance_score", 0.5)),
+                    social_score=float(result.get("social_score", 0.3)),
+                    personal_score=float(result.get("personal_score", 0.3)),
+                    topics=result.get("topics", [])
+                )
+                key = self._cache_key(item.title or "", item.text_content or "",
+                                      user_preferences)
+                self._cache[key] = classification
+                if len(self._cache) > self._CACHE_MAX:
+                    self._cache.popitem(last=False)
+                chunk_results.append(classification)
+            return chunk_results
+        except Exception:
+            rule_classifier = RuleBasedClassifier()
+            return [rule_classifier.classify(item) for item in items]
+
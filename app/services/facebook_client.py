@@ -1,18 +1,33 @@
 """
 Facebook Graph API client for fetching posts
 """
+import asyncio
 import httpx
-from typing import List, Dict, Optional
+import orjson
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 from app.core.encryption import decrypt_data
+from app.services.http_client import shared_async_client
+
+# Наборы полей Graph API — константы, собираются один раз при импорте
+_FB_POST_FIELDS = "id,message,created_time,from,likes.summary(true),comments.summary(true),shares"
 
 
 class FacebookClient:
     """Client for Facebook Graph API"""
-    
-    def __init__(self, access_token: str):
+
+    # ETag первой страницы фида: лента реверс-хронологическая, 304 на первой
+    # странице означает отсутствие новых постов — тело не качается. Ключ —
+    # (access_token, user_id): sync-путь всегда ходит с user_id="me", и без
+    # токена в ключе все пользователи воркера делили бы один слот
+    _etags: Dict[Tuple[str, str], str] = {}
+
+    def __init__(self, access_token: str,
+                 http_client: Optional[httpx.AsyncClient] = None):
         self.access_token = access_token
         self.base_url = "https://graph.facebook.com/v18.0"
+        # Общий клиент процесса: keep-alive вместо TLS handshake на каждый вызов
+        self._client = http_client or shared_async_client
     
     async def get_user_feed(
         self,
@@ -23,7 +38,7 @@ class FacebookClient:
         """Get user's feed/posts"""
         params = {
             "access_token": self.access_token,
-            "fields": "id,message,created_time,from,likes.summary(true),comments.summary(true),shares",
+            "fields": _FB_POST_FIELDS,
             "limit": min(limit, 100)
         }
         
@@ -31,27 +46,48 @@ class FacebookClient:
             params["since"] = int(since.timestamp())
         
         all_posts = []
-        next_url = f"{self.base_url}/{user_id}/feed"
-        
-        async with httpx.AsyncClient() as client:
-            while len(all_posts) < limit:
-                response = await client.get(next_url, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                posts = data.get("data", [])
-                all_posts.extend(posts)
-                
-                paging = data.get("paging", {})
-                next_url = paging.get("next")
-                
-                if not next_url:
-                    break
-                
-                # Remove access_token from next_url and add it as param
-                params = {"access_token": self.access_token}
-        
+
+        # Условный GET первой страницы: при 304 Graph API не шлет тело
+        headers = {}
+        etag = self._etags.get((self.access_token, user_id))
+        if etag:
+            headers["If-None-Match"] = etag
+        response = await self._client.get(
+            f"{self.base_url}/{user_id}/feed", params=params, headers=headers
+        )
+        if response.status_code == 304:
+            return []
+        response.raise_for_status()
+        if "ETag" in response.headers:
+            self._etags[(self.access_token, user_id)] = response.headers["ETag"]
+        data = orjson.loads(response.content)
+
+        # next-URL следующей страницы известен сразу после декода JSON —
+        # fetch K+1 запускается task'ом до обработки страницы K
+        while True:
+            posts = data.get("data", [])
+            next_url = data.get("paging", {}).get("next")
+
+            next_task = None
+            if next_url and len(all_posts) + len(posts) < limit:
+                # next уже содержит все параметры кроме access_token
+                next_task = asyncio.create_task(self._fetch_page(
+                    next_url, {"access_token": self.access_token}
+                ))
+
+            all_posts.extend(posts)
+
+            if next_task is None:
+                break
+            data = await next_task
+
         return all_posts[:limit]
+
+    async def _fetch_page(self, url: str, params: Dict) -> Dict:
+        """Fetch and decode one feed page"""
+        response = await self._client.get(url, params=params)
+        response.raise_for_status()
+        return orjson.loads(response.content)
     
     async def get_page_posts(
         self,
@@ -62,31 +98,29 @@ class FacebookClient:
         """Get posts from a Facebook page"""
         params = {
             "access_token": self.access_token,
-            "fields": "id,message,created_time,from,likes.summary(true),comments.summary(true),shares",
+            "fields": _FB_POST_FIELDS,
             "limit": min(limit, 100)
         }
         
         if since:
             params["since"] = int(since.timestamp())
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/{page_id}/posts",
-                params=params
-            )
-            response.raise_for_status()
-            return response.json().get("data", [])
+        response = await self._client.get(
+            f"{self.base_url}/{page_id}/posts",
+            params=params
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content).get("data", [])
     
     async def get_me(self) -> Dict:
         """Get authenticated user information"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/me",
-                params={
-                    "access_token": self.access_token,
-                    "fields": "id,name,email"
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self._client.get(
+            f"{self.base_url}/me",
+            params={
+                "access_token": self.access_token,
+                "fields": "id,name,email"
+            }
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
 
@@ -2,8 +2,11 @@
 Facebook OAuth 2.0 integration
 """
 import httpx
+import orjson
+from urllib.parse import urlencode
 from typing import Optional, Dict, List
 from app.core.config import settings
+from app.services.http_client import shared_async_client
 
 # Facebook OAuth endpoints
 FACEBOOK_AUTHORIZE_URL = "https://www.facebook.com/v18.0/dialog/oauth"
@@ -12,11 +15,13 @@ FACEBOOK_API_BASE = "https://graph.facebook.com/v18.0"
 
 
 class FacebookOAuth:
-    def __init__(self, app_id: str, app_secret: str, redirect_uri: str):
+    def __init__(self, app_id: str, app_secret: str, redirect_uri: str,
+                 http_client: Optional[httpx.AsyncClient] = None):
         self.app_id = app_id
         self.app_secret = app_secret
         self.redirect_uri = redirect_uri
-    
+        self._client = http_client or shared_async_client
+
     def get_authorization_url(self, state: str) -> str:
         """Generate Facebook OAuth authorization URL"""
         params = {
@@ -26,10 +31,10 @@ class FacebookOAuth:
             "scope": "pages_read_engagement,read_insights,public_profile",
             "response_type": "code"
         }
-        
-        query_string = "&".join([f"{k}={v}" for k, v in params.items()])
-        return f"{FACEBOOK_AUTHORIZE_URL}?{query_string}"
-    
+
+        # urlencode (C) и быстрее, и экранирует state/redirect_uri корректно
+        return f"{FACEBOOK_AUTHORIZE_URL}?{urlencode(params)}"
+
     async def exchange_code_for_tokens(self, code: str) -> Dict:
         """Exchange authorization code for access token"""
         params = {
@@ -38,15 +43,14 @@ class FacebookOAuth:
             "redirect_uri": self.redirect_uri,
             "code": code
         }
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                FACEBOOK_TOKEN_URL,
-                params=params
-            )
-            response.raise_for_status()
-            return response.json()
-    
+
+        response = await self._client.get(
+            FACEBOOK_TOKEN_URL,
+            params=params
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
     async def get_long_lived_token(self, short_lived_token: str) -> Dict:
         """Exchange short-lived token for long-lived token"""
         params = {
@@ -55,35 +59,31 @@ class FacebookOAuth:
             "client_secret": self.app_secret,
             "fb_exchange_token": short_lived_token
         }
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                FACEBOOK_TOKEN_URL,
-                params=params
-            )
-            response.raise_for_status()
-            return response.json()
-    
+
+        response = await self._client.get(
+            FACEBOOK_TOKEN_URL,
+            params=params
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
     async def get_user_info(self, access_token: str) -> Dict:
         """Get authenticated user information"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{FACEBOOK_API_BASE}/me",
-                params={
-                    "access_token": access_token,
-                    "fields": "id,name,email"
-                }
-            )
-            response.raise_for_status()
-            return response.json()
-    
+        response = await self._client.get(
+            f"{FACEBOOK_API_BASE}/me",
+            params={
+                "access_token": access_token,
+                "fields": "id,name,email"
+            }
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
     async def get_user_pages(self, access_token: str) -> List[Dict]:
         """Get user's Facebook pages"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{FACEBOOK_API_BASE}/me/accounts",
-                params={"access_token": access_token}
-            )
-            response.raise_for_status()
-            return response.json().get("data", [])
-
+        response = await self._client.get(
+            f"{FACEBOOK_API_BASE}/me/accounts",
+            params={"access_token": access_token}
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content).get("data", [])
@@ -0,0 +1,11 @@
+"""
+Shared HTTP client for outbound API calls
+"""
+import httpx
+
+# Один клиент на процесс: keep-alive соединения переиспользуются между
+# запросами, TLS handshake к внешним API не платится на каждый вызов
+shared_async_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_keepalive_connections=50)
+)
@@ -1,18 +1,34 @@
 """
 Instagram Basic Display API client for fetching media
 """
+import asyncio
 import httpx
-from typing import List, Dict, Optional
+import orjson
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 from app.core.encryption import decrypt_data
+from app.services.http_client import shared_async_client
+
+# Наборы полей Graph API — константы, собираются один раз при импорте
+_IG_MEDIA_FIELDS = "id,caption,media_type,media_url,permalink,thumbnail_url,timestamp,username"
+_IG_MEDIA_DETAIL_FIELDS = _IG_MEDIA_FIELDS + ",like_count,comments_count"
 
 
 class InstagramClient:
     """Client for Instagram Basic Display API"""
-    
-    def __init__(self, access_token: str):
+
+    # ETag первой страницы медиа: 304 означает, что новых публикаций нет —
+    # тело ответа не передается. Ключ — (access_token, user_id): sync-путь
+    # всегда ходит с user_id="me", и без токена в ключе все пользователи
+    # воркера делили бы один слот
+    _etags: Dict[Tuple[str, str], str] = {}
+
+    def __init__(self, access_token: str,
+                 http_client: Optional[httpx.AsyncClient] = None):
         self.access_token = access_token
         self.base_url = "https://graph.instagram.com"
+        # Общий клиент процесса: keep-alive вместо TLS handshake на каждый вызов
+        self._client = http_client or shared_async_client
     
     async def get_user_media(
         self,
@@ -22,7 +38,7 @@ class InstagramClient:
     ) -> List[Dict]:
         """Get user's media (photos and videos)"""
         params = {
-            "fields": "id,caption,media_type,media_url,permalink,thumbnail_url,timestamp,username",
+            "fields": _IG_MEDIA_FIELDS,
             "access_token": self.access_token,
             "limit": min(limit, 100)
         }
@@ -31,55 +47,68 @@ class InstagramClient:
             params["after"] = after
         
         all_media = []
-        next_cursor = None
-        
-        async with httpx.AsyncClient() as client:
-            while len(all_media) < limit:
-                if next_cursor:
-                    params["after"] = next_cursor
-                
-                response = await client.get(
-                    f"{self.base_url}/{user_id}/media",
-                    params=params
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                media_items = data.get("data", [])
-                all_media.extend(media_items)
-                
-                paging = data.get("paging", {})
-                cursors = paging.get("cursors", {})
-                next_cursor = cursors.get("after")
-                
-                if not next_cursor:
-                    break
-        
+        url = f"{self.base_url}/{user_id}/media"
+
+        # Условный GET первой страницы: при 304 Graph API не шлет тело
+        headers = {}
+        etag = self._etags.get((self.access_token, user_id))
+        if etag and not after:
+            headers["If-None-Match"] = etag
+        response = await self._client.get(url, params=params, headers=headers)
+        if response.status_code == 304:
+            return []
+        response.raise_for_status()
+        if "ETag" in response.headers and not after:
+            self._etags[(self.access_token, user_id)] = response.headers["ETag"]
+        data = orjson.loads(response.content)
+
+        # Курсор следующей страницы известен сразу после декода JSON —
+        # fetch K+1 запускается task'ом до обработки страницы K
+        while True:
+            media_items = data.get("data", [])
+            next_cursor = data.get("paging", {}).get("cursors", {}).get("after")
+
+            next_task = None
+            if next_cursor and len(all_media) + len(media_items) < limit:
+                next_params = dict(params)
+                next_params["after"] = next_cursor
+                next_task = asyncio.create_task(self._fetch_page(url, next_params))
+
+            all_media.extend(media_items)
+
+            if next_task is None:
+                break
+            data = await next_task
+
         return all_media[:limit]
+
+    async def _fetch_page(self, url: str, params: Dict) -> Dict:
+        """Fetch and decode one media page"""
+        response = await self._client.get(url, params=params)
+        response.raise_for_status()
+        return orjson.loads(response.content)
     
     async def get_media_details(self, media_id: str) -> Dict:
         """Get details of a specific media item"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/{media_id}",
-                params={
-                    "fields": "id,caption,media_type,media_url,permalink,thumbnail_url,timestamp,username,like_count,comments_count",
-                    "access_token": self.access_token
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self._client.get(
+            f"{self.base_url}/{media_id}",
+            params={
+                "fields": _IG_MEDIA_DETAIL_FIELDS,
+                "access_token": self.access_token
+            }
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
     
     async def get_me(self) -> Dict:
         """Get authenticated user information"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/me",
-                params={
-                    "fields": "id,username",
-                    "access_token": self.access_token
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self._client.get(
+            f"{self.base_url}/me",
+            params={
+                "fields": "id,username",
+                "access_token": self.access_token
+            }
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
 
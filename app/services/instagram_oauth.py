@@ -2,8 +2,11 @@
 Instagram Basic Display API OAuth integration
 """
 import httpx
+import orjson
+from urllib.parse import urlencode
 from typing import Optional, Dict
 from app.core.config import settings
+from app.services.http_client import shared_async_client
 
 # Instagram OAuth endpoints
 INSTAGRAM_AUTHORIZE_URL = "https://api.instagram.com/oauth/authorize"
@@ -12,11 +15,13 @@ INSTAGRAM_API_BASE = "https://graph.instagram.com"
 
 
 class InstagramOAuth:
-    def __init__(self, app_id: str, app_secret: str, redirect_uri: str):
+    def __init__(self, app_id: str, app_secret: str, redirect_uri: str,
+                 http_client: Optional[httpx.AsyncClient] = None):
         self.app_id = app_id
         self.app_secret = app_secret
         self.redirect_uri = redirect_uri
-    
+        self._client = http_client or shared_async_client
+
     def get_authorization_url(self, state: str) -> str:
         """Generate Instagram OAuth authorization URL"""
         params = {
@@ -26,10 +31,10 @@ class InstagramOAuth:
             "response_type": "code",
             "state": state
         }
-        
-        query_string = "&".join([f"{k}={v}" for k, v in params.items()])
-        return f"{INSTAGRAM_AUTHORIZE_URL}?{query_string}"
-    
+
+        # urlencode (C) и быстрее, и экранирует state/redirect_uri корректно
+        return f"{INSTAGRAM_AUTHORIZE_URL}?{urlencode(params)}"
+
     async def exchange_code_for_tokens(self, code: str) -> Dict:
         """Exchange authorization code for access token"""
         data = {
@@ -39,38 +44,34 @@ class InstagramOAuth:
             "redirect_uri": self.redirect_uri,
             "code": code
         }
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                INSTAGRAM_TOKEN_URL,
-                data=data
-            )
-            response.raise_for_status()
-            return response.json()
-    
+
+        response = await self._client.post(
+            INSTAGRAM_TOKEN_URL,
+            data=data
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
     async def refresh_access_token(self, access_token: str) -> Dict:
         """Refresh long-lived access token"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{INSTAGRAM_API_BASE}/refresh_access_token",
-                params={
-                    "grant_type": "ig_refresh_token",
-                    "access_token": access_token
-                }
-            )
-            response.raise_for_status()
-            return response.json()
-    
+        response = await self._client.get(
+            f"{INSTAGRAM_API_BASE}/refresh_access_token",
+            params={
+                "grant_type": "ig_refresh_token",
+                "access_token": access_token
+            }
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
     async def get_user_info(self, access_token: str) -> Dict:
         """Get authenticated user information"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{INSTAGRAM_API_BASE}/me",
-                params={
-                    "fields": "id,username",
-                    "access_token": access_token
-                }
-            )
-            response.raise_for_status()
-            return response.json()
-
+        response = await self._client.get(
+            f"{INSTAGRAM_API_BASE}/me",
+            params={
+                "fields": "id,username",
+                "access_token": access_token
+            }
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
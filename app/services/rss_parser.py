@@ -1,26 +1,202 @@
 """
 RSS feed parser service
 """
+import asyncio
+import email.utils
 import feedparser
-from typing import List, Dict
-from datetime import datetime
+import httpx
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import List, Dict, Optional
+from datetime import datetime, timezone
 from app.models.content import ContentType
 import logging
 
+try:
+    # C-парсер (Modest engine): на порядок быстрее html.parser из stdlib
+    from selectolax.parser import HTMLParser
+except ImportError:  # pragma: no cover
+    HTMLParser = None
+    from bs4 import BeautifulSoup
+
+try:
+    # Потоковый C-парсер XML: для корректных RSS2/Atom фидов в 10-30 раз
+    # быстрее feedparser и не материализует FeedParserDict на весь фид
+    from lxml import etree
+except ImportError:  # pragma: no cover
+    etree = None
+
 logger = logging.getLogger(__name__)
 
 
+def _strip_html(content: str) -> str:
+    """Strip HTML tags from entry content"""
+    if HTMLParser is not None:
+        return HTMLParser(content).text(separator=' ')
+    return BeautifulSoup(content, 'html.parser').get_text()
+
+
+def _to_naive_utc(dt: datetime) -> datetime:
+    """Naive UTC, как у feedparser (datetime(*published_parsed[:6]))"""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+try:
+    # C-парсер ISO 8601 (понимает суффикс Z без .replace)
+    import ciso8601
+except ImportError:  # pragma: no cover
+    ciso8601 = None
+
+
+def _parse_date(value: str) -> Optional[datetime]:
+    """Parse RFC 822 (RSS) or ISO 8601 (Atom) date"""
+    if not value:
+        return None
+    try:
+        if ciso8601 is not None:
+            return _to_naive_utc(ciso8601.parse_datetime(value))
+        return _to_naive_utc(datetime.fromisoformat(value.replace("Z", "+00:00")))
+    except ValueError:
+        pass
+    try:
+        return _to_naive_utc(email.utils.parsedate_to_datetime(value))
+    except (TypeError, ValueError):
+        return None
+
+
 class RSSParser:
     """Parse RSS feeds and extract content"""
-    
+
+    # (etag, modified) последнего удачного опроса по URL фида: следующий
+    # запрос уходит условным, и неизменившийся фид возвращает 304 без тела —
+    # ни трафика, ни повторного XML-парсинга
+    _conditional: Dict[str, tuple] = {}
+
     def parse_feed(self, feed_url: str) -> List[Dict]:
         """Parse RSS feed and return content items"""
+        if etree is not None:
+            items = self._parse_feed_lxml(feed_url)
+            if items is not None:
+                return items
+        return self._parse_feed_feedparser(feed_url)
+
+    def _parse_feed_lxml(self, feed_url: str) -> Optional[List[Dict]]:
+        """Fast path: stream well-formed RSS2/Atom through lxml iterparse.
+
+        Возвращает None на сетевой ошибке или кривом XML — тогда фид
+        дочитывает терпимый к мусору feedparser.
+        """
         try:
-            feed = feedparser.parse(feed_url)
-            
+            etag, modified = self._conditional.get(feed_url, (None, None))
+            headers = {}
+            if etag:
+                headers["If-None-Match"] = etag
+            if modified:
+                headers["If-Modified-Since"] = modified
+            response = httpx.get(feed_url, headers=headers,
+                                 follow_redirects=True, timeout=30.0)
+            if response.status_code == 304:
+                return []
+            response.raise_for_status()
+            if response.headers.get("ETag") or response.headers.get("Last-Modified"):
+                self._conditional[feed_url] = (
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified")
+                )
+
+            items = []
+            feed_title = ""
+            feed_link = ""
+            # iterparse отдает элементы по мере разбора; elem.clear() после
+            # каждого item держит пиковую память на уровне одной записи
+            for _, elem in etree.iterparse(BytesIO(response.content), events=("end",)):
+                tag = etree.QName(elem).localname
+                if tag in ("item", "entry"):
+                    items.append(self._item_from_element(elem, feed_title, feed_link))
+                    elem.clear()
+                elif tag in ("title", "link"):
+                    parent = elem.getparent()
+                    if parent is not None and etree.QName(parent).localname in ("channel", "feed"):
+                        if tag == "title":
+                            feed_title = elem.text or ""
+                        else:
+                            feed_link = elem.text or elem.get("href") or ""
+            return items
+        except Exception as e:
+            logger.warning(f"lxml parse failed for {feed_url}, "
+                           f"falling back to feedparser: {e}")
+            return None
+
+    def _item_from_element(self, elem, feed_title: str, feed_link: str) -> Dict:
+        """Build a content item dict from an RSS <item> / Atom <entry>"""
+        def text(name: str) -> str:
+            return elem.findtext(f"{{*}}{name}") or ""
+
+        # RSS: <link>url</link>; Atom: <link href="url"/>
+        link = text("link")
+        if not link:
+            link_elem = elem.find("{*}link")
+            if link_elem is not None:
+                link = link_elem.get("href") or ""
+
+        guid = text("guid") or text("id")
+        content = text("description") or text("summary") or text("content")
+        if content:
+            content = _strip_html(content)
+
+        author = text("creator") or text("author")
+        if not author:
+            author_elem = elem.find("{*}author/{*}name")
+            if author_elem is not None:
+                author = author_elem.text or ""
+
+        published_at = (
+            _parse_date(text("pubDate"))
+            or _parse_date(text("published"))
+            or _parse_date(text("updated"))
+            or datetime.utcnow()
+        )
+
+        tags = [
+            tag_elem.get("term") or tag_elem.text or ""
+            for tag_elem in elem.findall("{*}category")
+        ]
+
+        return {
+            "external_id": guid or link,
+            "title": text("title"),
+            "text_content": content,
+            "url": link,
+            "author": author,
+            "published_at": published_at,
+            "metadata": {
+                "feed_title": feed_title,
+                "feed_link": feed_link,
+                "tags": tags
+            },
+            "raw_data": {
+                "guid": guid,
+                "link": link
+            }
+        }
+
+    def _parse_feed_feedparser(self, feed_url: str) -> List[Dict]:
+        """Tolerant path: feedparser survives malformed markup"""
+        try:
+            etag, modified = self._conditional.get(feed_url, (None, None))
+            feed = feedparser.parse(feed_url, etag=etag, modified=modified)
+
+            if getattr(feed, "status", None) == 304:
+                return []
+
             if feed.bozo:
                 logger.warning(f"Feed parsing error: {feed.bozo_exception}")
-            
+
+            if feed.get("etag") or feed.get("modified"):
+                self._conditional[feed_url] = (feed.get("etag"), feed.get("modified"))
+
             items = []
             for entry in feed.entries:
                 # Parse published date
@@ -29,16 +205,14 @@ class RSSParser:
                     published_at = datetime(*entry.published_parsed[:6])
                 elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
                     published_at = datetime(*entry.updated_parsed[:6])
-                
+
                 # Extract content
                 content = entry.get('summary', '') or entry.get('description', '')
-                
+
                 # Clean HTML from content
-                from bs4 import BeautifulSoup
                 if content:
-                    soup = BeautifulSoup(content, 'html.parser')
-                    content = soup.get_text()
-                
+                    content = _strip_html(content)
+
                 item = {
                     "external_id": entry.get('id', entry.get('link', '')),
                     "title": entry.get('title', ''),
@@ -51,15 +225,68 @@ class RSSParser:
                         "feed_link": feed.feed.get('link', ''),
                         "tags": [tag.get('term', '') for tag in entry.get('tags', [])]
                     },
+                    # dict(entry) копировал весь FeedParserDict (вложенные
+                    # теги, ссылки, summary) — в сырье хранится только то,
+                    # по чему элемент можно найти в фиде заново
                     "raw_data": {
-                        "entry": dict(entry)
+                        "guid": entry.get('id', ''),
+                        "link": entry.get('link', '')
                     }
                 }
                 items.append(item)
-            
+
             return items
-            
+
         except Exception as e:
             logger.error(f"Error parsing RSS feed {feed_url}: {str(e)}", exc_info=True)
             return []
 
+    async def parse_feeds(self, feed_urls: List[str]) -> List[List[Dict]]:
+        """Parse multiple feeds in parallel without blocking the event loop.
+
+        Парсинг — чистый CPU (GIL-bound) и сам ходит по сети, поэтому
+        из async-кода фиды разбираются в пуле процессов: N фидов парсятся
+        за время одного, event loop не блокируется. Пул живет на процесс,
+        а conditional-кэш родителя — источник истины: состояние уезжает
+        в воркер аргументом и возвращается с результатом.
+        """
+        loop = asyncio.get_running_loop()
+        executor = _get_feed_executor()
+        results = await asyncio.gather(*(
+            loop.run_in_executor(
+                executor, _parse_feed_job, url, self._conditional.get(url)
+            )
+            for url in feed_urls
+        ))
+
+        all_items = []
+        for url, (items, conditional) in zip(feed_urls, results):
+            if conditional is not None:
+                self._conditional[url] = conditional
+            all_items.append(items)
+        return all_items
+
+
+# Один пул на процесс: спавн воркеров не оплачивается каждым вызовом
+# parse_feeds, а их прогретые импорты переживают вызовы
+_feed_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_feed_executor() -> ProcessPoolExecutor:
+    global _feed_executor
+    if _feed_executor is None:
+        _feed_executor = ProcessPoolExecutor()
+    return _feed_executor
+
+
+def _parse_feed_job(feed_url: str, conditional: Optional[tuple]) -> tuple:
+    """Parse one feed in a pool worker, round-tripping conditional state.
+
+    У воркера свой экземпляр _conditional — без подсева из родителя и
+    возврата обратно условные GET'ы работали бы только внутри одного
+    воркера и терялись при его смерти.
+    """
+    if conditional is not None:
+        RSSParser._conditional[feed_url] = conditional
+    items = RSSParser().parse_feed(feed_url)
+    return items, RSSParser._conditional.get(feed_url)
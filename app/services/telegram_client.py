@@ -2,25 +2,33 @@
 Telegram Bot API client for fetching messages
 """
 import httpx
+import orjson
 from typing import List, Dict, Optional
 from datetime import datetime
 from app.core.encryption import decrypt_data
 
 
+# Общий клиент с keep-alive: новый AsyncClient на каждый вызов платит
+# полный TCP+TLS handshake к api.telegram.org
+_shared_client = httpx.AsyncClient(
+    limits=httpx.Limits(max_keepalive_connections=20)
+)
+
+
 class TelegramClient:
     """Client for Telegram Bot API"""
-    
-    def __init__(self, bot_token: str):
+
+    def __init__(self, bot_token: str, http_client: Optional[httpx.AsyncClient] = None):
         self.bot_token = bot_token
         self.base_url = f"https://api.telegram.org/bot{bot_token}"
-    
+        self._client = http_client or _shared_client
+
     async def get_me(self) -> Dict:
         """Get bot information"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{self.base_url}/getMe")
-            response.raise_for_status()
-            return response.json()
-    
+        response = await self._client.get(f"{self.base_url}/getMe")
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
     async def get_updates(
         self,
         offset: Optional[int] = None,
@@ -34,35 +42,32 @@ class TelegramClient:
         }
         if offset:
             params["offset"] = offset
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/getUpdates",
-                params=params
-            )
-            response.raise_for_status()
-            data = response.json()
-            return data.get("result", [])
-    
+
+        response = await self._client.get(
+            f"{self.base_url}/getUpdates",
+            params=params
+        )
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        return data.get("result", [])
+
     async def get_chat(self, chat_id: str) -> Dict:
         """Get chat information"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/getChat",
-                params={"chat_id": chat_id}
-            )
-            response.raise_for_status()
-            return response.json()
-    
+        response = await self._client.get(
+            f"{self.base_url}/getChat",
+            params={"chat_id": chat_id}
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
     async def get_chat_members_count(self, chat_id: str) -> int:
         """Get number of members in chat"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/getChatMembersCount",
-                params={"chat_id": chat_id}
-            )
-            response.raise_for_status()
-            return response.json().get("result", 0)
+        response = await self._client.get(
+            f"{self.base_url}/getChatMembersCount",
+            params={"chat_id": chat_id}
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content).get("result", 0)
 
 
 class TelegramUserClient:
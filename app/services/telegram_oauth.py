@@ -2,47 +2,58 @@
 Telegram Bot setup and webhook configuration
 """
 import httpx
+import orjson
 from typing import Dict, Optional
+from app.services.http_client import shared_async_client
 
 
 class TelegramBotSetup:
     """Setup and manage Telegram bot"""
-    
-    def __init__(self, bot_token: str):
+
+    def __init__(self, bot_token: str,
+                 http_client: Optional[httpx.AsyncClient] = None):
         self.bot_token = bot_token
         self.base_url = f"https://api.telegram.org/bot{bot_token}"
+        # Общий клиент процесса: keep-alive вместо TLS handshake на каждый вызов
+        self._client = http_client or shared_async_client
     
-    async def set_webhook(self, webhook_url: str) -> Dict:
+    async def set_webhook(self, webhook_url: str,
+                          secret_token: Optional[str] = None,
+                          allowed_updates: Optional[list] = None,
+                          max_connections: Optional[int] = None) -> Dict:
         """Set webhook URL for receiving updates"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/setWebhook",
-                json={"url": webhook_url}
-            )
-            response.raise_for_status()
-            return response.json()
+        payload: Dict = {"url": webhook_url}
+        if secret_token:
+            payload["secret_token"] = secret_token
+        if allowed_updates:
+            payload["allowed_updates"] = allowed_updates
+        if max_connections:
+            payload["max_connections"] = max_connections
+        response = await self._client.post(
+            f"{self.base_url}/setWebhook",
+            json=payload
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
     
     async def delete_webhook(self) -> Dict:
         """Delete webhook"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(f"{self.base_url}/deleteWebhook")
-            response.raise_for_status()
-            return response.json()
+        response = await self._client.post(f"{self.base_url}/deleteWebhook")
+        response.raise_for_status()
+        return orjson.loads(response.content)
     
     async def get_webhook_info(self) -> Dict:
         """Get webhook information"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{self.base_url}/getWebhookInfo")
-            response.raise_for_status()
-            return response.json()
+        response = await self._client.get(f"{self.base_url}/getWebhookInfo")
+        response.raise_for_status()
+        return orjson.loads(response.content)
     
     async def create_invite_link(self, chat_id: str) -> str:
         """Create invite link for bot to join chat"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/createChatInviteLink",
-                params={"chat_id": chat_id}
-            )
-            response.raise_for_status()
-            return response.json().get("result", {}).get("invite_link", "")
+        response = await self._client.post(
+            f"{self.base_url}/createChatInviteLink",
+            params={"chat_id": chat_id}
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content).get("result", {}).get("invite_link", "")
 
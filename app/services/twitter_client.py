@@ -1,17 +1,32 @@
 """
 Twitter API client for fetching user timeline
 """
+import asyncio
 import httpx
+import orjson
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 from app.core.encryption import decrypt_data
+from app.services.http_client import shared_async_client
 
 
 class TwitterClient:
-    def __init__(self, access_token: str):
+    def __init__(self, access_token: str,
+                 http_client: Optional[httpx.AsyncClient] = None):
         self.access_token = access_token
         self.base_url = "https://api.twitter.com/2"
-    
+        # Общий клиент процесса: keep-alive вместо TLS handshake на каждый вызов
+        self._client = http_client or shared_async_client
+        # ID аутентифицированного пользователя резолвится один раз на инстанс:
+        # без кэша каждый вызов timeline платил лишний RTT на /users/me
+        self._me_id: Optional[str] = None
+
+    async def _resolve_me(self) -> Optional[str]:
+        """Resolve and cache the authenticated user's ID"""
+        user_info = await self.get_me()
+        self._me_id = user_info.get("data", {}).get("id")
+        return self._me_id
+
     async def get_user_timeline(
         self,
         user_id: Optional[str] = None,
@@ -21,9 +36,7 @@ class TwitterClient:
     ) -> List[Dict]:
         """Get user timeline tweets"""
         if not user_id:
-            # Get authenticated user's ID first
-            user_info = await self.get_me()
-            user_id = user_info.get("data", {}).get("id")
+            user_id = self._me_id or await self._resolve_me()
         
         url = f"{self.base_url}/users/{user_id}/tweets"
         params = {
@@ -40,42 +53,48 @@ class TwitterClient:
             params["start_time"] = start_time.isoformat()
         
         all_tweets = []
-        next_token = None
-        
-        async with httpx.AsyncClient() as client:
-            while len(all_tweets) < max_results:
-                if next_token:
-                    params["pagination_token"] = next_token
-                
-                response = await client.get(
-                    url,
-                    params=params,
-                    headers={"Authorization": f"Bearer {self.access_token}"}
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                tweets = data.get("data", [])
-                all_tweets.extend(tweets)
-                
-                meta = data.get("meta", {})
-                next_token = meta.get("next_token")
-                
-                if not next_token:
-                    break
-        
+
+        # Курсор следующей страницы известен сразу после декода JSON —
+        # fetch K+1 запускается task'ом до обработки страницы K, сеть и
+        # обработка перекрываются (строго курсорный API, иначе нельзя)
+        data = await self._fetch_page(url, params)
+        while True:
+            tweets = data.get("data", [])
+            next_token = data.get("meta", {}).get("next_token")
+
+            next_task = None
+            if next_token and len(all_tweets) + len(tweets) < max_results:
+                next_params = dict(params)
+                next_params["pagination_token"] = next_token
+                next_task = asyncio.create_task(self._fetch_page(url, next_params))
+
+            all_tweets.extend(tweets)
+
+            if next_task is None:
+                break
+            data = await next_task
+
         return all_tweets[:max_results]
+
+    async def _fetch_page(self, url: str, params: Dict) -> Dict:
+        """Fetch and decode one timeline page"""
+        response = await self._client.get(
+            url,
+            params=params,
+            headers={"Authorization": f"Bearer {self.access_token}"}
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
     
     async def get_me(self) -> Dict:
         """Get authenticated user information"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/users/me",
-                params={"user.fields": "name,username"},
-                headers={"Authorization": f"Bearer {self.access_token}"}
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self._client.get(
+            f"{self.base_url}/users/me",
+            params={"user.fields": "name,username"},
+            headers={"Authorization": f"Bearer {self.access_token}"}
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
     
     async def get_following_timeline(
         self,
@@ -94,12 +113,11 @@ class TwitterClient:
         # For now, we'll use user's own timeline
         # This can be enhanced with Twitter API v2 timeline endpoint when available
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                url,
-                params=params,
-                headers={"Authorization": f"Bearer {self.access_token}"}
-            )
-            response.raise_for_status()
-            return response.json().get("data", [])
+        response = await self._client.get(
+            url,
+            params=params,
+            headers={"Authorization": f"Bearer {self.access_token}"}
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content).get("data", [])
 
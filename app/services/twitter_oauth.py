@@ -2,8 +2,11 @@
 Twitter OAuth 2.0 integration
 """
 import httpx
+import orjson
+from urllib.parse import urlencode
 from typing import Optional, Dict
 from app.core.config import settings
+from app.services.http_client import shared_async_client
 
 # Twitter OAuth endpoints
 TWITTER_AUTHORIZE_URL = "https://twitter.com/i/oauth2/authorize"
@@ -12,11 +15,13 @@ TWITTER_API_BASE = "https://api.twitter.com/2"
 
 
 class TwitterOAuth:
-    def __init__(self, client_id: str, client_secret: str, redirect_uri: str):
+    def __init__(self, client_id: str, client_secret: str, redirect_uri: str,
+                 http_client: Optional[httpx.AsyncClient] = None):
         self.client_id = client_id
         self.client_secret = client_secret
         self.redirect_uri = redirect_uri
-    
+        self._client = http_client or shared_async_client
+
     def get_authorization_url(self, state: str, code_challenge: str, code_challenge_method: str = "plain") -> str:
         """Generate Twitter OAuth authorization URL"""
         params = {
@@ -28,10 +33,10 @@ class TwitterOAuth:
             "code_challenge": code_challenge,
             "code_challenge_method": code_challenge_method
         }
-        
-        query_string = "&".join([f"{k}={v}" for k, v in params.items()])
-        return f"{TWITTER_AUTHORIZE_URL}?{query_string}"
-    
+
+        # urlencode (C) и быстрее, и экранирует state/redirect_uri корректно
+        return f"{TWITTER_AUTHORIZE_URL}?{urlencode(params)}"
+
     async def exchange_code_for_tokens(self, code: str, code_verifier: Optional[str] = None) -> Dict:
         """Exchange authorization code for access and refresh tokens"""
         data = {
@@ -40,22 +45,21 @@ class TwitterOAuth:
             "client_id": self.client_id,
             "redirect_uri": self.redirect_uri,
         }
-        
+
         if code_verifier:
             data["code_verifier"] = code_verifier
-        
+
         auth = (self.client_id, self.client_secret)
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                TWITTER_TOKEN_URL,
-                data=data,
-                auth=auth,
-                headers={"Content-Type": "application/x-www-form-urlencoded"}
-            )
-            response.raise_for_status()
-            return response.json()
-    
+
+        response = await self._client.post(
+            TWITTER_TOKEN_URL,
+            data=data,
+            auth=auth,
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
     async def refresh_access_token(self, refresh_token: str) -> Dict:
         """Refresh access token using refresh token"""
         data = {
@@ -63,26 +67,23 @@ class TwitterOAuth:
             "grant_type": "refresh_token",
             "client_id": self.client_id,
         }
-        
+
         auth = (self.client_id, self.client_secret)
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                TWITTER_TOKEN_URL,
-                data=data,
-                auth=auth,
-                headers={"Content-Type": "application/x-www-form-urlencoded"}
-            )
-            response.raise_for_status()
-            return response.json()
-    
+
+        response = await self._client.post(
+            TWITTER_TOKEN_URL,
+            data=data,
+            auth=auth,
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
     async def get_user_info(self, access_token: str) -> Dict:
         """Get authenticated user information"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{TWITTER_API_BASE}/users/me",
-                headers={"Authorization": f"Bearer {access_token}"}
-            )
-            response.raise_for_status()
-            return response.json()
-
+        response = await self._client.get(
+            f"{TWITTER_API_BASE}/users/me",
+            headers={"Authorization": f"Bearer {access_token}"}
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
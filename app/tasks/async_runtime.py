@@ -0,0 +1,25 @@
+"""
+Shared asyncio runtime for Celery worker processes
+"""
+import asyncio
+import threading
+
+# Один event loop на процесс воркера: создание лупа (селектор, обработчики
+# сигналов) не оплачивается каждой задачей, а httpx-клиенты, привязанные к
+# лупу, сохраняют keep-alive соединения между задачами
+_holder = threading.local()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Return the worker's persistent event loop, creating it lazily"""
+    loop = getattr(_holder, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        _holder.loop = loop
+    return loop
+
+
+def run_coro(coro):
+    """Run a coroutine to completion on the persistent loop"""
+    return get_loop().run_until_complete(coro)
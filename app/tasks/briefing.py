@@ -1,7 +1,8 @@
 """
 Celery tasks for generating briefings
 """
-from celery import Task
+from celery import Task, group
+from sqlalchemy import exists, or_
 from sqlalchemy.orm import Session
 from datetime import datetime, date, timedelta
 from app.tasks.celery_app import celery_app
@@ -12,17 +13,37 @@ from app.models.content import ContentItem
 from app.services.briefing_generator import BriefingGenerator
 from app.services.classification import RuleBasedClassifier, AIClassifier
 from app.core.config import settings
+from app.tasks.async_runtime import run_coro
+import httpx
 import openai
 import os
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-openai_client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY) if settings.OPENAI_API_KEY else None
+# Initialize OpenAI client поверх общего HTTP/2-клиента: соединения
+# переиспользуются между всеми брифингами процесса
+from app.services.http_client import shared_async_client
+openai_client = openai.AsyncOpenAI(
+    api_key=settings.OPENAI_API_KEY,
+    http_client=shared_async_client
+) if settings.OPENAI_API_KEY else None
 
 
-@celery_app.task(bind=True, name="app.tasks.briefing.generate_briefing")
+# Ошибки, после которых повтор имеет смысл: сетевые сбои и ответы OpenAI
+# уровня 429/5xx (APITimeoutError и APIConnectionError — подклассы APIError)
+_RETRYABLE_ERRORS = (httpx.HTTPError, openai.APIError)
+
+
+@celery_app.task(
+    bind=True,
+    name="app.tasks.briefing.generate_briefing",
+    autoretry_for=_RETRYABLE_ERRORS,
+    retry_backoff=2,
+    retry_backoff_max=600,
+    retry_jitter=True,
+    max_retries=5,
+)
 def generate_briefing(self: Task, user_id: str, briefing_date: str = None):
     """Generate briefing for a specific user and date"""
     db = SessionLocal()
@@ -65,67 +86,79 @@ def generate_briefing(self: Task, user_id: str, briefing_date: str = None):
         db.commit()
         db.refresh(briefing)
         
-        # Generate briefing
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
+        # Generate briefing (постоянный луп воркера, см. async_runtime)
         try:
-            # Select content
+            # Select content — проекция (id, snippet, relevance_score):
+            # для промпта и ссылок BriefingContent полные сущности не нужны
             generator = BriefingGenerator(openai_client)
-            content_items = generator.select_content_for_briefing(db, user)
-            
-            if not content_items:
+            content_rows = generator.select_content_snippets_for_briefing(db, user)
+
+            if not content_rows:
                 briefing.status = BriefingStatus.FAILED
                 briefing.error_message = "No content available for briefing"
                 db.commit()
                 return briefing.id
-            
-            # Generate text summary
-            text_summary = loop.run_until_complete(
-                generator.generate_text_summary(content_items, user)
-            )
-            
-            # Generate audio
-            audio_data = loop.run_until_complete(
-                generator.generate_audio(text_summary)
+
+            # Generate text summary and audio in one streaming pipeline:
+            # TTS начинает работать с первых предложений, не дожидаясь
+            # полного ответа LLM; аудио пишется чанками сразу на диск
+            audio_path, audio_url = prepare_audio_file(briefing.id)
+            text_summary = run_coro(
+                generator.generate_summary_and_audio(
+                    [row.snippet for row in content_rows], user, audio_path
+                )
             )
             
-            # Save audio file
-            audio_url = save_audio_file(briefing.id, audio_data)
-            
             # Update briefing
             briefing.text_summary = text_summary
             briefing.audio_file_url = audio_url
             briefing.audio_duration_seconds = settings.BRIEFING_DURATION_SECONDS
-            briefing.content_items_count = len(content_items)
+            briefing.content_items_count = len(content_rows)
             briefing.generated_at = datetime.utcnow()
             briefing.status = BriefingStatus.READY
             
-            # Create briefing_content links
+            # Create briefing_content links одним INSERT'ом (executemany),
+            # а не по round trip'у на строку
+            from sqlalchemy import insert
             from app.models.briefing import BriefingContent
-            for order, item in enumerate(content_items, 1):
-                briefing_content = BriefingContent(
-                    briefing_id=briefing.id,
-                    content_id=item.id,
-                    order=order,
-                    included_reason=f"Relevance: {item.classification.relevance_score:.2f}"
-                )
-                db.add(briefing_content)
-            
+            db.execute(
+                insert(BriefingContent),
+                [
+                    {
+                        "briefing_id": briefing.id,
+                        "content_id": row.id,
+                        "order": order,
+                        "included_reason": f"Relevance: {row.relevance_score:.2f}"
+                    }
+                    for order, row in enumerate(content_rows, 1)
+                ]
+            )
+
             db.commit()
             logger.info(f"Briefing {briefing.id} generated successfully")
             
+        except _RETRYABLE_ERRORS as e:
+            # Транзиентный сбой сети/OpenAI: брифинг остается в GENERATING,
+            # autoretry перепланирует задачу с backoff'ом и доведет его;
+            # FAILED фиксируем только после исчерпания попыток
+            if self.request.retries < self.max_retries:
+                db.rollback()
+                raise
+            logger.error(f"Error generating briefing: {str(e)}", exc_info=True)
+            briefing.status = BriefingStatus.FAILED
+            briefing.error_message = str(e)
+            db.commit()
         except Exception as e:
             logger.error(f"Error generating briefing: {str(e)}", exc_info=True)
             briefing.status = BriefingStatus.FAILED
             briefing.error_message = str(e)
             db.commit()
-        finally:
-            loop.close()
-        
+
         return briefing.id
-        
+
+    except _RETRYABLE_ERRORS:
+        # Пробрасываем до autoretry; сессия закроется в finally
+        raise
     except Exception as e:
         logger.error(f"Critical error in generate_briefing: {str(e)}", exc_info=True)
         db.rollback()
@@ -133,15 +166,16 @@ def generate_briefing(self: Task, user_id: str, briefing_date: str = None):
         db.close()
 
 
-def save_audio_file(briefing_id: str, audio_data: bytes) -> str:
-    """Save audio file and return URL"""
+def prepare_audio_file(briefing_id: str) -> tuple[str, str]:
+    """Prepare the audio destination, return (file_path, public_url).
+
+    Сам файл пишет TTS-конвейер чанками — полные байты аудио в задаче
+    не материализуются.
+    """
     if settings.STORAGE_TYPE == "local":
-        # Save locally
         os.makedirs(settings.STORAGE_LOCAL_PATH, exist_ok=True)
         file_path = os.path.join(settings.STORAGE_LOCAL_PATH, f"{briefing_id}.mp3")
-        with open(file_path, "wb") as f:
-            f.write(audio_data)
-        return f"/storage/{briefing_id}.mp3"
+        return file_path, f"/storage/{briefing_id}.mp3"
     else:
         # TODO: Implement S3/Azure storage
         raise NotImplementedError("S3/Azure storage not implemented yet")
@@ -152,44 +186,68 @@ def generate_daily_briefings():
     """Generate briefings for all users who need them today"""
     db = SessionLocal()
     try:
-        # Get all active users
-        users = db.query(User).filter(
-            User.deleted_at.is_(None),
-            User.is_active == True
-        ).all()
-        
         current_time = datetime.utcnow()
         today = date.today()
-        
-        for user in users:
-            # Check if it's time to generate briefing
-            briefing_time = user.briefing_time
-            briefing_datetime = datetime.combine(today, briefing_time)
-            
-            # Generate 10 minutes before briefing time
-            generation_time = briefing_datetime - timedelta(
-                minutes=settings.BRIEFING_GENERATION_START_MINUTES
+
+        # Окно генерации [0, 1ч] после (briefing_time - offset) выражено как
+        # интервал по briefing_time: в Python приезжают только id попавших в
+        # окно пользователей, а не все активные строки целиком
+        offset = timedelta(minutes=settings.BRIEFING_GENERATION_START_MINUTES)
+        window_upper = (current_time + offset).time()
+        window_lower = (current_time + offset - timedelta(hours=1)).time()
+        if window_lower <= window_upper:
+            in_window = User.briefing_time.between(window_lower, window_upper)
+        else:
+            # Окно пересекает полночь — интервал распадается на два
+            in_window = or_(
+                User.briefing_time >= window_lower,
+                User.briefing_time <= window_upper,
             )
-            
-            # Check if we're in the generation window (within 1 hour)
-            time_diff = (current_time - generation_time).total_seconds()
-            if 0 <= time_diff <= 3600:  # Within 1 hour window
-                # Check if briefing already exists
-                existing = db.query(Briefing).filter(
-                    Briefing.user_id == user.id,
-                    Briefing.date == today
-                ).first()
-                
-                if not existing or existing.status != BriefingStatus.DELIVERED:
-                    # Queue briefing generation
-                    generate_briefing.delay(str(user.id), today.isoformat())
-                    logger.info(f"Queued briefing generation for user {user.id}")
+
+        user_ids = [
+            row.id
+            for row in db.query(User.id).filter(
+                User.deleted_at.is_(None),
+                User.is_active == True,
+                in_window
+            )
+        ]
+
+        # Статусы сегодняшних брифингов одним запросом вместо SELECT'а
+        # на каждого пользователя в цикле
+        delivered_user_ids = {
+            row.user_id
+            for row in db.query(Briefing.user_id).filter(
+                Briefing.date == today,
+                Briefing.status == BriefingStatus.DELIVERED
+            )
+        }
+
+        due_user_ids = [
+            str(user_id) for user_id in user_ids
+            if user_id not in delivered_user_ids
+        ]
+
+        # group() публикует все подзадачи одним заходом в брокер
+        if due_user_ids:
+            group(
+                generate_briefing.s(user_id, today.isoformat())
+                for user_id in due_user_ids
+            ).apply_async()
+        logger.info(f"Queued briefing generation for {len(due_user_ids)} users")
         
     finally:
         db.close()
 
 
-@celery_app.task(name="app.tasks.briefing.classify_pending_content")
+@celery_app.task(
+    name="app.tasks.briefing.classify_pending_content",
+    autoretry_for=_RETRYABLE_ERRORS,
+    retry_backoff=2,
+    retry_backoff_max=600,
+    retry_jitter=True,
+    max_retries=5,
+)
 def classify_pending_content():
     """Classify unclassified content items"""
     db = SessionLocal()
@@ -198,47 +256,58 @@ def classify_pending_content():
         
         # Get unclassified content (last 24 hours)
         cutoff_time = datetime.utcnow() - timedelta(hours=24)
-        
-        unclassified = db.query(ContentItem).outerjoin(ContentClassification).filter(
-            ContentClassification.id.is_(None),
-            ContentItem.published_at >= cutoff_time
-        ).limit(100).all()
-        
+
         classifier = RuleBasedClassifier()
         ai_classifier = AIClassifier(openai_client) if openai_client else None
-        
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            for item in unclassified:
-                # Use AI classifier if available, otherwise rule-based
-                if ai_classifier:
-                    classification_data = loop.run_until_complete(
-                        ai_classifier.classify(item)
-                    )
-                else:
-                    classification_data = classifier.classify(item)
-                
-                # Create classification
+
+        # NOT EXISTS вместо OUTER JOIN ... IS NULL: планировщик делает
+        # anti-join напрямую. Keyset-пагинация по id выгребает весь бэклог
+        # за один запуск задачи, а не 100 строк раз в полчаса
+        total_classified = 0
+        last_id = None
+        while True:
+            query = db.query(ContentItem).filter(
+                ~exists().where(ContentClassification.content_id == ContentItem.id),
+                ContentItem.published_at >= cutoff_time
+            )
+            if last_id is not None:
+                query = query.filter(ContentItem.id > last_id)
+            unclassified = query.order_by(ContentItem.id).limit(500).all()
+            if not unclassified:
+                break
+
+            # Весь батч классифицируется одним заходом в event loop: чанки
+            # по 20 элементов уходят к OpenAI параллельно внутри
+            # classify_batch, вместо RTT на каждый элемент по очереди
+            if ai_classifier:
+                results = run_coro(ai_classifier.classify_batch(unclassified))
+            else:
+                results = [classifier.classify(item) for item in unclassified]
+
+            for item, classification_data in zip(unclassified, results):
                 classification = ContentClassification(
                     content_id=item.id,
-                    category=classification_data["category"],
-                    relevance_score=classification_data["relevance_score"],
-                    importance_score=classification_data["importance_score"],
-                    social_score=classification_data["social_score"],
-                    personal_score=classification_data["personal_score"],
-                    topics=classification_data.get("topics", []),
+                    category=classification_data.category,
+                    relevance_score=classification_data.relevance_score,
+                    importance_score=classification_data.importance_score,
+                    social_score=classification_data.social_score,
+                    personal_score=classification_data.personal_score,
+                    topics=classification_data.topics,
                     model_version="rule-based-v1" if not ai_classifier else "gpt-4-v1"
                 )
                 db.add(classification)
-            
+
             db.commit()
-            logger.info(f"Classified {len(unclassified)} content items")
-        finally:
-            loop.close()
-        
+            total_classified += len(unclassified)
+            last_id = unclassified[-1].id
+
+        logger.info(f"Classified {total_classified} content items")
+
+    except _RETRYABLE_ERRORS:
+        # Коммит идет после каждой страницы, NOT EXISTS на повторе
+        # подхватит только неклассифицированный остаток
+        db.rollback()
+        raise
     except Exception as e:
         logger.error(f"Error classifying content: {str(e)}", exc_info=True)
         db.rollback()
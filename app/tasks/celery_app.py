@@ -2,6 +2,7 @@
 Celery application configuration
 """
 from celery import Celery
+from celery.signals import worker_process_init
 from app.core.config import settings
 
 celery_app = Celery(
@@ -22,6 +23,18 @@ celery_app.conf.update(
     task_soft_time_limit=25 * 60,  # 25 minutes
 )
 
+@worker_process_init.connect
+def _init_worker_loop(**kwargs):
+    """Прогрев постоянного event loop при форке воркера.
+
+    Луп (и привязанные к нему httpx/OpenAI клиенты) создается до первой
+    задачи, а не внутри нее — первая задача процесса не платит за
+    инициализацию селектора и клиентов.
+    """
+    from app.tasks.async_runtime import get_loop
+    get_loop()
+
+
 # Celery Beat schedule
 celery_app.conf.beat_schedule = {
     "sync-all-sources": {
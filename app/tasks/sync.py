@@ -1,26 +1,51 @@
 """
 Celery tasks for syncing content from data sources
 """
-from celery import Task
+from celery import Task, group
+from sqlalchemy import func, or_, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from app.tasks.celery_app import celery_app
 from app.core.database import SessionLocal
 from app.models.data_source import DataSource, SourceType
-from app.models.content import ContentItem, ContentType
+from app.models.content import ContentItem, ContentRaw, ContentType
 from app.models.sync_log import SyncLog, SyncStatus
 from app.services.twitter_client import TwitterClient
 from app.services.rss_parser import RSSParser
 from app.services.telegram_client import TelegramClient
 from app.services.facebook_client import FacebookClient
 from app.services.instagram_client import InstagramClient
-from app.core.encryption import decrypt_data
+from app.tasks.async_runtime import run_coro
+import httpx
 import logging
 
 logger = logging.getLogger(__name__)
 
+try:
+    # C-парсер ISO 8601 (понимает суффикс Z без .replace) — на порядок
+    # быстрее fromisoformat в цикле по сотне элементов
+    import ciso8601
+except ImportError:  # pragma: no cover
+    ciso8601 = None
 
-@celery_app.task(bind=True, name="app.tasks.sync.sync_data_source")
+
+def _parse_iso(value: str) -> datetime:
+    """Parse an ISO 8601 timestamp (handles a trailing Z)"""
+    if ciso8601 is not None:
+        return ciso8601.parse_datetime(value)
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+@celery_app.task(
+    bind=True,
+    name="app.tasks.sync.sync_data_source",
+    autoretry_for=(httpx.HTTPError,),
+    retry_backoff=2,
+    retry_backoff_max=600,
+    retry_jitter=True,
+    max_retries=5,
+)
 def sync_data_source(self: Task, source_id: str):
     """Sync content from a specific data source"""
     db = SessionLocal()
@@ -41,22 +66,26 @@ def sync_data_source(self: Task, source_id: str):
         error_message = None
         
         try:
-            if source.source_type == SourceType.TWITTER:
-                items_fetched, items_new, items_updated = sync_twitter_source(db, source)
-            elif source.source_type == SourceType.RSS:
-                items_fetched, items_new, items_updated = sync_rss_source(db, source)
-            elif source.source_type == SourceType.TELEGRAM:
-                items_fetched, items_new, items_updated = sync_telegram_source(db, source)
-            elif source.source_type == SourceType.FACEBOOK:
-                items_fetched, items_new, items_updated = sync_facebook_source(db, source)
-            elif source.source_type == SourceType.INSTAGRAM:
-                items_fetched, items_new, items_updated = sync_instagram_source(db, source)
+            handler = _SYNC_HANDLERS.get(source.source_type)
+            if handler is not None:
+                items_fetched, items_new, items_updated = handler(db, source)
             else:
                 logger.warning(f"Unsupported source type: {source.source_type}")
                 items_fetched = items_new = items_updated = 0
             
             status = SyncStatus.SUCCESS if not error_message else SyncStatus.PARTIAL
-            
+
+        except httpx.HTTPError as e:
+            # Транзиентная сетевая ошибка (429, 5xx, обрыв TLS): отдаем ее
+            # autoretry с экспоненциальным backoff'ом вместо ожидания
+            # следующего планового цикла; FAILED пишем только когда
+            # попытки исчерпаны
+            if self.request.retries < self.max_retries:
+                db.rollback()
+                raise
+            logger.error(f"Error syncing source {source_id}: {str(e)}", exc_info=True)
+            status = SyncStatus.FAILED
+            error_message = str(e)
         except Exception as e:
             logger.error(f"Error syncing source {source_id}: {str(e)}", exc_info=True)
             status = SyncStatus.FAILED
@@ -78,6 +107,9 @@ def sync_data_source(self: Task, source_id: str):
         db.add(sync_log)
         db.commit()
         
+    except httpx.HTTPError:
+        # Пробрасываем до autoretry; сессия закроется в finally
+        raise
     except Exception as e:
         logger.error(f"Critical error in sync_data_source: {str(e)}", exc_info=True)
         db.rollback()
@@ -85,16 +117,85 @@ def sync_data_source(self: Task, source_id: str):
         db.close()
 
 
+def _upsert_content_items(db: Session, rows: dict,
+                          raw_by_external: dict) -> tuple[int, int]:
+    """Bulk UPSERT a batch of content items and their raw payloads.
+
+    Один INSERT ... ON CONFLICT (source_id, external_id) DO UPDATE на весь
+    батч вместо ORM-flush'а по строке: и существование, и вставка, и
+    обновление решаются сервером за один round trip. Уникальный индекс
+    uq_content_source_external служит arbiter'ом; (xmax = 0) в RETURNING
+    отличает вставленные строки от обновленных.
+
+    rows: external_id -> dict колонок (дубликаты в батче схлопнуты).
+    """
+    if not rows:
+        db.commit()
+        return 0, 0
+
+    stmt = pg_insert(ContentItem).values(list(rows.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["source_id", "external_id"],
+        set_={
+            "title": stmt.excluded.title,
+            "text_content": stmt.excluded.text_content,
+            "url": stmt.excluded.url,
+            "author": stmt.excluded.author,
+            # Ключи set_ — физические имена колонок, без ORM-маппинга:
+            # колонка называется "metadata", item_metadata — только атрибут
+            "metadata": stmt.excluded["metadata"],
+        },
+        # Не перезаписываем строку, если содержимое не изменилось: no-op
+        # UPDATE все равно порождает WAL и мертвую версию строки. Такие
+        # строки не попадают в RETURNING — не считаются updated и не
+        # переписывают raw_data
+        where=or_(
+            ContentItem.title.is_distinct_from(stmt.excluded.title),
+            ContentItem.text_content.is_distinct_from(stmt.excluded.text_content),
+            ContentItem.url.is_distinct_from(stmt.excluded.url),
+            ContentItem.author.is_distinct_from(stmt.excluded.author),
+            ContentItem.item_metadata.is_distinct_from(stmt.excluded["metadata"]),
+        )
+    ).returning(
+        ContentItem.id,
+        ContentItem.external_id,
+        text("(xmax = 0) AS inserted")
+    )
+    result = db.execute(stmt)
+
+    items_new = 0
+    items_updated = 0
+    raw_rows = []
+    for row in result:
+        if row.inserted:
+            items_new += 1
+        else:
+            items_updated += 1
+        raw_data = raw_by_external.get(row.external_id)
+        if raw_data is not None:
+            raw_rows.append({"content_id": row.id, "raw_data": raw_data})
+
+    if raw_rows:
+        raw_stmt = pg_insert(ContentRaw).values(raw_rows)
+        raw_stmt = raw_stmt.on_conflict_do_update(
+            index_elements=["content_id"],
+            set_={"raw_data": raw_stmt.excluded.raw_data},
+            where=ContentRaw.raw_data.is_distinct_from(raw_stmt.excluded.raw_data)
+        )
+        db.execute(raw_stmt)
+
+    db.commit()
+    return items_new, items_updated
+
+
 def sync_twitter_source(db: Session, source: DataSource) -> tuple[int, int, int]:
     """Sync content from Twitter source"""
-    import asyncio
-    
     if not source.credentials:
         raise ValueError("No credentials found for Twitter source")
     
-    # Decrypt credentials
-    credentials = source.credentials
-    access_token = decrypt_data(credentials["access_token"])
+    # Decrypt credentials (один вызов GCM на инстанс, дальше из кэша)
+    credentials = source.decrypted_credentials
+    access_token = credentials["access_token"]
     
     # Initialize Twitter client
     twitter_client = TwitterClient(access_token)
@@ -106,66 +207,39 @@ def sync_twitter_source(db: Session, source: DataSource) -> tuple[int, int, int]
     else:
         start_time = datetime.utcnow() - timedelta(hours=24)
     
-    # Get user timeline (async call in sync function)
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        tweets = loop.run_until_complete(
-            twitter_client.get_user_timeline(
-                user_id=credentials.get("twitter_user_id"),
-                max_results=100,
-                start_time=start_time
-            )
+    # Get user timeline (постоянный луп воркера, см. async_runtime)
+    tweets = run_coro(
+        twitter_client.get_user_timeline(
+            user_id=credentials.get("twitter_user_id"),
+            max_results=100,
+            start_time=start_time
         )
-    finally:
-        loop.close()
+    )
     
     items_fetched = len(tweets)
-    items_new = 0
-    items_updated = 0
-    
+
+    rows = {}
+    raw_by_external = {}
     for tweet in tweets:
         external_id = tweet.get("id")
-        
-        # Check if content item already exists
-        existing_item = db.query(ContentItem).filter(
-            ContentItem.source_id == source.id,
-            ContentItem.external_id == external_id
-        ).first()
-        
-        if existing_item:
-            # Update existing item
-            existing_item.text_content = tweet.get("text")
-            existing_item.item_metadata = {
+        if not external_id:
+            continue
+        rows[external_id] = {
+            "source_id": source.id,
+            "external_id": external_id,
+            "content_type": ContentType.POST,
+            "text_content": tweet.get("text"),
+            "url": f"https://twitter.com/i/web/status/{external_id}",
+            "author": credentials.get("twitter_username"),
+            "published_at": _parse_iso(tweet.get("created_at")),
+            "item_metadata": {
                 "public_metrics": tweet.get("public_metrics", {}),
                 "lang": tweet.get("lang")
-            }
-            existing_item.raw_data = tweet
-            items_updated += 1
-        else:
-            # Create new content item
-            published_at = datetime.fromisoformat(
-                tweet.get("created_at").replace("Z", "+00:00")
-            )
-            
-            new_item = ContentItem(
-                source_id=source.id,
-                external_id=external_id,
-                content_type=ContentType.POST,
-                text_content=tweet.get("text"),
-                url=f"https://twitter.com/i/web/status/{external_id}",
-                author=credentials.get("twitter_username"),
-                published_at=published_at,
-                item_metadata={
-                    "public_metrics": tweet.get("public_metrics", {}),
-                    "lang": tweet.get("lang")
-                },
-                raw_data=tweet
-            )
-            db.add(new_item)
-            items_new += 1
-    
-    db.commit()
+            },
+        }
+        raw_by_external[external_id] = tweet
+
+    items_new, items_updated = _upsert_content_items(db, rows, raw_by_external)
     return items_fetched, items_new, items_updated
 
 
@@ -181,140 +255,101 @@ def sync_rss_source(db: Session, source: DataSource) -> tuple[int, int, int]:
     feed_items = rss_parser.parse_feed(feed_url)
     
     items_fetched = len(feed_items)
-    items_new = 0
-    items_updated = 0
-    
+
+    rows = {}
+    raw_by_external = {}
     for item_data in feed_items:
         external_id = item_data["external_id"]
-        
-        # Check if content item already exists
-        existing_item = db.query(ContentItem).filter(
-            ContentItem.source_id == source.id,
-            ContentItem.external_id == external_id
-        ).first()
-        
-        if existing_item:
-            # Update existing item
-            existing_item.title = item_data.get("title")
-            existing_item.text_content = item_data.get("text_content")
-            existing_item.url = item_data.get("url")
-            existing_item.author = item_data.get("author")
-            existing_item.item_metadata = item_data.get("metadata")
-            existing_item.raw_data = item_data.get("raw_data")
-            items_updated += 1
-        else:
-            # Create new content item
-            new_item = ContentItem(
-                source_id=source.id,
-                external_id=external_id,
-                content_type=ContentType.ARTICLE,
-                title=item_data.get("title"),
-                text_content=item_data.get("text_content"),
-                url=item_data.get("url"),
-                author=item_data.get("author"),
-                published_at=item_data.get("published_at"),
-                item_metadata=item_data.get("metadata"),
-                raw_data=item_data.get("raw_data")
-            )
-            db.add(new_item)
-            items_new += 1
-    
-    db.commit()
+        if not external_id:
+            continue
+        rows[external_id] = {
+            "source_id": source.id,
+            "external_id": external_id,
+            "content_type": ContentType.ARTICLE,
+            "title": item_data.get("title"),
+            "text_content": item_data.get("text_content"),
+            "url": item_data.get("url"),
+            "author": item_data.get("author"),
+            "published_at": item_data.get("published_at"),
+            "item_metadata": item_data.get("metadata"),
+        }
+        raw_by_external[external_id] = item_data.get("raw_data")
+
+    items_new, items_updated = _upsert_content_items(db, rows, raw_by_external)
     return items_fetched, items_new, items_updated
 
 
 def sync_telegram_source(db: Session, source: DataSource) -> tuple[int, int, int]:
     """Sync content from Telegram source"""
-    import asyncio
-    
     if not source.credentials:
         raise ValueError("No credentials found for Telegram source")
     
-    credentials = source.credentials
-    bot_token = decrypt_data(credentials["bot_token"])
+    credentials = source.decrypted_credentials
+    bot_token = credentials["bot_token"]
     telegram_client = TelegramClient(bot_token)
-    
-    # Get last sync time or default to 24 hours ago
-    last_sync = source.last_sync_at
-    if last_sync:
-        # Get updates after last sync
-        offset = int(last_sync.timestamp())
-    else:
-        offset = None
-    
-    # Get updates
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        updates = loop.run_until_complete(
-            telegram_client.get_updates(offset=offset, limit=100)
-        )
-    finally:
-        loop.close()
+
+    # offset у Bot API — это update_id, а не unix-время: прежний
+    # int(last_sync.timestamp()) либо перечитывал историю, либо
+    # пропускал всё. Храним последний виденный update_id в settings
+    last_update_id = (source.settings or {}).get("last_update_id")
+    offset = last_update_id + 1 if last_update_id else None
+
+    # Get updates (постоянный луп воркера)
+    updates = run_coro(telegram_client.get_updates(offset=offset, limit=100))
     
     items_fetched = len(updates)
-    items_new = 0
-    items_updated = 0
-    
+
+    if updates:
+        source.settings = {
+            **(source.settings or {}),
+            "last_update_id": max(u["update_id"] for u in updates),
+        }
+
+    rows = {}
+    raw_by_external = {}
     for update in updates:
         message = update.get("message", {})
         if not message:
             continue
-        
+
         external_id = str(message.get("message_id", ""))
-        chat_id = str(message.get("chat", {}).get("id", ""))
-        
-        # Check if content item already exists
-        existing_item = db.query(ContentItem).filter(
-            ContentItem.source_id == source.id,
-            ContentItem.external_id == external_id
-        ).first()
-        
-        if existing_item:
-            items_updated += 1
+        if not external_id:
             continue
-        
+
         # Parse message date
         message_date = message.get("date")
         if message_date:
-            published_at = datetime.fromtimestamp(message_date)
+            # tz=utc сразу: дальше не нужно чинить наивное локальное время
+            published_at = datetime.fromtimestamp(message_date, tz=timezone.utc)
         else:
             published_at = datetime.utcnow()
-        
-        # Get message text
-        text = message.get("text", "") or message.get("caption", "")
-        
-        # Create new content item
-        new_item = ContentItem(
-            source_id=source.id,
-            external_id=external_id,
-            content_type=ContentType.MESSAGE,
-            text_content=text,
-            author=message.get("from", {}).get("username", ""),
-            published_at=published_at,
-            item_metadata={
-                "chat_id": chat_id,
+
+        rows[external_id] = {
+            "source_id": source.id,
+            "external_id": external_id,
+            "content_type": ContentType.MESSAGE,
+            "text_content": message.get("text", "") or message.get("caption", ""),
+            "author": message.get("from", {}).get("username", ""),
+            "published_at": published_at,
+            "item_metadata": {
+                "chat_id": str(message.get("chat", {}).get("id", "")),
                 "chat_type": message.get("chat", {}).get("type", ""),
                 "message_type": message.get("message_type", "text")
             },
-            raw_data=message
-        )
-        db.add(new_item)
-        items_new += 1
-    
-    db.commit()
+        }
+        raw_by_external[external_id] = message
+
+    items_new, items_updated = _upsert_content_items(db, rows, raw_by_external)
     return items_fetched, items_new, items_updated
 
 
 def sync_facebook_source(db: Session, source: DataSource) -> tuple[int, int, int]:
     """Sync content from Facebook source"""
-    import asyncio
-    
     if not source.credentials:
         raise ValueError("No credentials found for Facebook source")
     
-    credentials = source.credentials
-    access_token = decrypt_data(credentials["access_token"])
+    credentials = source.decrypted_credentials
+    access_token = credentials["access_token"]
     facebook_client = FacebookClient(access_token)
     
     # Get last sync time or default to 24 hours ago
@@ -324,168 +359,139 @@ def sync_facebook_source(db: Session, source: DataSource) -> tuple[int, int, int
     else:
         start_time = datetime.utcnow() - timedelta(hours=24)
     
-    # Get user feed
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        posts = loop.run_until_complete(
-            facebook_client.get_user_feed(
-                user_id="me",
-                limit=100,
-                since=start_time
-            )
-        )
-    finally:
-        loop.close()
+    # Get user feed (постоянный луп воркера)
+    posts = run_coro(
+        facebook_client.get_user_feed(user_id="me", limit=100, since=start_time)
+    )
     
     items_fetched = len(posts)
-    items_new = 0
-    items_updated = 0
-    
+
+    rows = {}
+    raw_by_external = {}
     for post in posts:
         external_id = post.get("id", "")
-        
-        # Check if content item already exists
-        existing_item = db.query(ContentItem).filter(
-            ContentItem.source_id == source.id,
-            ContentItem.external_id == external_id
-        ).first()
-        
-        if existing_item:
-            existing_item.text_content = post.get("message", "")
-            existing_item.item_metadata = {
+        if not external_id:
+            continue
+
+        # Parse created time
+        created_time = post.get("created_time", "")
+        if created_time:
+            published_at = _parse_iso(created_time)
+        else:
+            published_at = datetime.utcnow()
+
+        rows[external_id] = {
+            "source_id": source.id,
+            "external_id": external_id,
+            "content_type": ContentType.POST,
+            "text_content": post.get("message", ""),
+            "author": post.get("from", {}).get("name", ""),
+            "published_at": published_at,
+            "item_metadata": {
                 "likes": post.get("likes", {}).get("summary", {}).get("total_count", 0),
                 "comments": post.get("comments", {}).get("summary", {}).get("total_count", 0),
                 "shares": post.get("shares", {}).get("count", 0)
-            }
-            existing_item.raw_data = post
-            items_updated += 1
-        else:
-            # Parse created time
-            created_time = post.get("created_time", "")
-            if created_time:
-                published_at = datetime.fromisoformat(created_time.replace("Z", "+00:00"))
-            else:
-                published_at = datetime.utcnow()
-            
-            new_item = ContentItem(
-                source_id=source.id,
-                external_id=external_id,
-                content_type=ContentType.POST,
-                text_content=post.get("message", ""),
-                author=post.get("from", {}).get("name", ""),
-                published_at=published_at,
-                item_metadata={
-                    "likes": post.get("likes", {}).get("summary", {}).get("total_count", 0),
-                    "comments": post.get("comments", {}).get("summary", {}).get("total_count", 0),
-                    "shares": post.get("shares", {}).get("count", 0)
-                },
-                raw_data=post
-            )
-            db.add(new_item)
-            items_new += 1
-    
-    db.commit()
+            },
+        }
+        raw_by_external[external_id] = post
+
+    items_new, items_updated = _upsert_content_items(db, rows, raw_by_external)
     return items_fetched, items_new, items_updated
 
 
 def sync_instagram_source(db: Session, source: DataSource) -> tuple[int, int, int]:
     """Sync content from Instagram source"""
-    import asyncio
-    
     if not source.credentials:
         raise ValueError("No credentials found for Instagram source")
     
-    credentials = source.credentials
-    access_token = decrypt_data(credentials["access_token"])
+    credentials = source.decrypted_credentials
+    access_token = credentials["access_token"]
     instagram_client = InstagramClient(access_token)
     
     # Get last sync time or default to 24 hours ago
     last_sync = source.last_sync_at
     
-    # Get user media
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        media_items = loop.run_until_complete(
-            instagram_client.get_user_media(user_id="me", limit=100)
-        )
-    finally:
-        loop.close()
+    # Get user media (постоянный луп воркера)
+    media_items = run_coro(
+        instagram_client.get_user_media(user_id="me", limit=100)
+    )
     
     items_fetched = len(media_items)
-    items_new = 0
-    items_updated = 0
-    
+
+    rows = {}
+    raw_by_external = {}
     for media in media_items:
         external_id = media.get("id", "")
-        
-        # Check if content item already exists
-        existing_item = db.query(ContentItem).filter(
-            ContentItem.source_id == source.id,
-            ContentItem.external_id == external_id
-        ).first()
-        
-        if existing_item:
-            existing_item.text_content = media.get("caption", "")
-            existing_item.item_metadata = {
+        if not external_id:
+            continue
+
+        # Parse timestamp
+        timestamp = media.get("timestamp", "")
+        if timestamp:
+            published_at = _parse_iso(timestamp)
+        else:
+            published_at = datetime.utcnow()
+
+        rows[external_id] = {
+            "source_id": source.id,
+            "external_id": external_id,
+            "content_type": ContentType.POST,
+            "title": media.get("caption", "")[:200] if media.get("caption") else None,
+            "text_content": media.get("caption", ""),
+            "url": media.get("permalink", ""),
+            "author": media.get("username", ""),
+            "published_at": published_at,
+            "item_metadata": {
                 "media_type": media.get("media_type", ""),
                 "media_url": media.get("media_url", ""),
-                "permalink": media.get("permalink", "")
-            }
-            existing_item.raw_data = media
-            items_updated += 1
-        else:
-            # Parse timestamp
-            timestamp = media.get("timestamp", "")
-            if timestamp:
-                published_at = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-            else:
-                published_at = datetime.utcnow()
-            
-            new_item = ContentItem(
-                source_id=source.id,
-                external_id=external_id,
-                content_type=ContentType.POST,
-                title=media.get("caption", "")[:200] if media.get("caption") else None,
-                text_content=media.get("caption", ""),
-                url=media.get("permalink", ""),
-                author=media.get("username", ""),
-                published_at=published_at,
-                item_metadata={
-                    "media_type": media.get("media_type", ""),
-                    "media_url": media.get("media_url", ""),
-                    "thumbnail_url": media.get("thumbnail_url", "")
-                },
-                raw_data=media
-            )
-            db.add(new_item)
-            items_new += 1
-    
-    db.commit()
+                "thumbnail_url": media.get("thumbnail_url", "")
+            },
+        }
+        raw_by_external[external_id] = media
+
+    items_new, items_updated = _upsert_content_items(db, rows, raw_by_external)
     return items_fetched, items_new, items_updated
 
 
+# Таблица адаптеров вместо if/elif-цепочки: добавление источника — одна
+# строка здесь плюс функция fetch+normalize. Общая DB-часть (батчевый
+# UPSERT, подсчет new/updated, commit) живет в _upsert_content_items и
+# применяется ко всем типам единообразно
+_SYNC_HANDLERS = {
+    SourceType.TWITTER: sync_twitter_source,
+    SourceType.RSS: sync_rss_source,
+    SourceType.TELEGRAM: sync_telegram_source,
+    SourceType.FACEBOOK: sync_facebook_source,
+    SourceType.INSTAGRAM: sync_instagram_source,
+}
+
+
 @celery_app.task(name="app.tasks.sync.sync_all_sources")
 def sync_all_sources():
     """Sync all active data sources"""
     db = SessionLocal()
     try:
-        sources = db.query(DataSource).filter(
-            DataSource.is_active == True
-        ).all()
-        
-        for source in sources:
-            # Check if it's time to sync
-            if source.last_sync_at:
-                time_since_sync = datetime.utcnow() - source.last_sync_at
-                sync_interval = timedelta(minutes=source.sync_frequency_minutes)
-                if time_since_sync < sync_interval:
-                    continue
-            
-            # Queue sync task
-            sync_data_source.delay(str(source.id))
-            logger.info(f"Queued sync for source {source.id}")
+        # Фильтр "пора ли синкать" выражен в WHERE: в Python приходят только
+        # id действительно просроченных источников, а не полные строки всех
+        # активных с отбраковкой на месте
+        due_ids = [
+            str(row.id)
+            for row in db.query(DataSource.id).filter(
+                DataSource.is_active == True,
+                or_(
+                    DataSource.last_sync_at.is_(None),
+                    DataSource.last_sync_at < datetime.utcnow() - func.make_interval(
+                        0, 0, 0, 0, 0, DataSource.sync_frequency_minutes
+                    )
+                )
+            )
+        ]
+
+        # group() публикует все подзадачи одним заходом в брокер вместо
+        # round trip'а на каждый .delay()
+        if due_ids:
+            group(sync_data_source.s(source_id) for source_id in due_ids).apply_async()
+        logger.info(f"Queued sync for {len(due_ids)} sources")
         
     finally:
         db.close()
@@ -0,0 +1,21 @@
+"""
+Gunicorn configuration: gunicorn main:app -c gunicorn_conf.py
+"""
+import multiprocessing
+
+bind = "0.0.0.0:8000"
+
+# GIL не дает распараллелить dispatch внутри одного процесса — масштабируемся
+# процессами; 2*CPU+1 воркеров перекрывают простои на I/O
+workers = multiprocessing.cpu_count() * 2 + 1
+worker_class = "uvicorn.workers.UvicornWorker"
+worker_connections = 4096
+
+# Держим соединения балансировщика открытыми между запросами
+keepalive = 75
+
+# Запас SYN-очереди на всплески, чтобы соединения не отбрасывались на accept
+backlog = 2048
+
+accesslog = None
+loglevel = "warning"
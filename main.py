@@ -1,34 +1,159 @@
 # FORCE REDEPLOY - $(Get-Date)
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-
-app = FastAPI()
-
-# Добавь эту хуйню для CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",    # React dev сервер
-        "http://localhost:5173",    # Vite dev сервер  
-        "http://127.0.0.1:3000",    # Localhost альтернативный
-        "http://127.0.0.1:5173",    # Vite альтернативный
-        "https://gsaprykin452-lang-backend-2024-3498.twc1.net",  # Твой бекенд
-        # Добавь сюда URL твоего фронтенда когда задеплоишь
-    ],
-    allow_credentials=True,
-    allow_methods=["*"],  # Разрешить все методы (GET, POST, etc.)
-    allow_headers=["*"],  # Разрешить все заголовки
-)
-
-@app.get("/")
-def read_root():
-    return {"message": "Server is working!"}
-
-@app.get("/health")
-def health_check():
-    return {"status": "ok"}
+import orjson
 
+# Ответы этих ручек фиксированы — сериализуем один раз при импорте,
+# на запросе отдаются готовые bytes без jsonable_encoder и json.dumps
+_ROOT_BODY = orjson.dumps({"message": "Server is working!"})
+_HEALTH_BODY = orjson.dumps({"status": "ok"})
+_CORS_BODY = orjson.dumps({"message": "CORS is working, motherfucker!"})
+
+# Сразу frozenset из bytes: заголовок origin приходит из scope как bytes,
+# проверка — один хэш-лукап без decode и без прохода по списку
+ALLOWED_ORIGINS: frozenset = frozenset(origin.encode("ascii") for origin in (
+    "http://localhost:3000",    # React dev сервер
+    "http://localhost:5173",    # Vite dev сервер
+    "http://127.0.0.1:3000",    # Localhost альтернативный
+    "http://127.0.0.1:5173",    # Vite альтернативный
+    "https://gsaprykin452-lang-backend-2024-3498.twc1.net",  # Твой бекенд
+    # Добавь сюда URL твоего фронтенда когда задеплоишь
+))
+
+# Заголовки preflight-ответа собраны заранее для каждого origin'а:
+# на горячем пути остается lookup по dict и два ASGI-сообщения
+PREFLIGHT_HEADERS = {
+    origin: [
+        (b"access-control-allow-origin", origin),
+        (b"access-control-allow-methods", b"GET,POST,PUT,DELETE,PATCH,OPTIONS"),
+        (b"access-control-allow-headers", b"*"),
+        (b"access-control-allow-credentials", b"true"),
+        (b"access-control-max-age", b"600"),
+        (b"content-length", b"0"),
+    ]
+    for origin in ALLOWED_ORIGINS
+}
+
+# Хвост заголовков простого (не-preflight) ответа — тоже на каждый origin
+SIMPLE_HEADERS = {
+    origin: [
+        (b"access-control-allow-origin", origin),
+        (b"access-control-allow-credentials", b"true"),
+        (b"vary", b"Origin"),
+    ]
+    for origin in ALLOWED_ORIGINS
+}
+
+
+# CORS руками, без starlette'овского CORSMiddleware: заголовки берутся
+# прямо из scope как bytes, preflight отвечается двумя ASGI-сообщениями,
+# никаких Request/Response объектов на каждый запрос
+class FastCORS:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Один проход по заголовкам: origin и маркер preflight'а снимаются
+        # за тот же скан, второго обхода scope["headers"] нет
+        origin = None
+        request_method = None
+        for key, value in scope["headers"]:
+            if key == b"origin":
+                origin = value
+            elif key == b"access-control-request-method":
+                request_method = value
+
+        if origin is None or origin not in ALLOWED_ORIGINS:
+            await self.app(scope, receive, send)
+            return
+
+        if request_method is not None and scope["method"] == "OPTIONS":
+            # Preflight закрывается тут же, до роутера
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": PREFLIGHT_HEADERS[origin],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message["headers"]) + SIMPLE_HEADERS[origin]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+
+def _route(body: bytes, status: int = 200) -> tuple:
+    """Prebuild the (start, body) ASGI message pair for a constant response"""
+    return (
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        },
+        {"type": "http.response.body", "body": body},
+    )
+
+
+# ASGI-сообщения собраны целиком при импорте и разделяются всеми
+# запросами (uvicorn их не мутирует)
+_START_ROOT, _BODY_ROOT = _route(_ROOT_BODY)
+_START_HEALTH, _BODY_HEALTH = _route(_HEALTH_BODY)
 # Добавь еще этот ебучий эндпоинт для теста CORS
-@app.get("/test-cors")
-def test_cors():
-    return {"message": "CORS is working, motherfucker!"}
\ No newline at end of file
+_START_CORS, _BODY_CORS = _route(_CORS_BODY)
+_START_404, _BODY_404 = _route(orjson.dumps({"detail": "Not Found"}), status=404)
+
+
+# Для трех фиксированных путей цепочка сравнений bytes-литералов дешевле
+# dict-лукапа: нет вычисления хэша, /health (самый частый) идет первым.
+# Предлагавшийся exec-кодген дал бы ровно этот же байткод — роуты
+# фиксированы в исходнике, так что цепочка написана руками
+async def _dispatch(scope, receive, send):
+    path = scope["raw_path"]
+    if path == b"/health":
+        await send(_START_HEALTH)
+        await send(_BODY_HEALTH)
+    elif path == b"/":
+        await send(_START_ROOT)
+        await send(_BODY_ROOT)
+    elif path == b"/test-cors":
+        await send(_START_CORS)
+        await send(_BODY_CORS)
+    else:
+        await send(_START_404)
+        await send(_BODY_404)
+
+
+app = FastCORS(_dispatch)
+
+
+if __name__ == "__main__":
+    import multiprocessing
+
+    import uvicorn
+
+    # uvloop + httptools вместо дефолтных asyncio/h11: C-реализации цикла
+    # и парсера HTTP. access_log выключен — это запись в StreamHandler на
+    # каждый запрос. date_header/server_header убирают formatdate и лишние
+    # байты из каждого ответа; keep-alive 75с держит соединения
+    # балансировщика открытыми между пробами
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=multiprocessing.cpu_count(),
+        log_level="warning",
+        access_log=False,
+        timeout_keep_alive=75,
+        server_header=False,
+        date_header=False,
+    )
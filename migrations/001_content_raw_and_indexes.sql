@@ -0,0 +1,91 @@
+-- Миграция схемы под серию оптимизаций: вынос сырых данных из content_items
+-- и индексы, на которые опираются горячие запросы и ON CONFLICT в OAuth
+-- callback'ах. Alembic в проекте нет — применяется руками:
+--
+--     psql "$DATABASE_URL" -f migrations/001_content_raw_and_indexes.sql
+--
+-- Скрипт идемпотентный (IF NOT EXISTS / проверки в DO-блоках), повторный
+-- прогон безопасен. На большой продовой таблице content_items индексы
+-- лучше строить через CREATE INDEX CONCURRENTLY (вне транзакции) — здесь
+-- обычный CREATE, чтобы файл можно было гнать одним psql -f.
+
+BEGIN;
+
+-- gen_random_uuid(): до PG13 живет в pgcrypto
+CREATE EXTENSION IF NOT EXISTS pgcrypto;
+
+-- ---------------------------------------------------------------------------
+-- 1. Сырые данные провайдера — в отдельную таблицу, чтобы горячие сканы
+--    content_items не detoast'или JSONB-блобы
+-- ---------------------------------------------------------------------------
+
+CREATE TABLE IF NOT EXISTS content_items_raw (
+    content_id UUID PRIMARY KEY REFERENCES content_items (id) ON DELETE CASCADE,
+    raw_data   JSONB
+);
+
+-- Перенос существующих payload'ов и дроп старой колонки — только если
+-- колонка еще на месте (повторный прогон ее уже не найдет)
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'content_items' AND column_name = 'raw_data'
+    ) THEN
+        INSERT INTO content_items_raw (content_id, raw_data)
+        SELECT id, raw_data FROM content_items WHERE raw_data IS NOT NULL
+        ON CONFLICT (content_id) DO NOTHING;
+
+        ALTER TABLE content_items DROP COLUMN raw_data;
+    END IF;
+END $$;
+
+-- ---------------------------------------------------------------------------
+-- 2. Индексы content_items
+-- ---------------------------------------------------------------------------
+
+-- Покрывающий индекс под отбор контента для брифингов: фильтр
+-- source_id + published_at >= cutoff, DESC совпадает с ORDER BY, INCLUDE
+-- дает index-only scan без похода в heap за title. text_content в INCLUDE
+-- нельзя — btree-кортеж ограничен ~2.7 КБ
+CREATE INDEX IF NOT EXISTS idx_content_src_pub
+    ON content_items (source_id, published_at DESC)
+    INCLUDE (title);
+
+-- BRIN на порядки меньше B-tree для append-only временных данных
+CREATE INDEX IF NOT EXISTS idx_content_published_brin
+    ON content_items USING brin (published_at);
+
+-- ---------------------------------------------------------------------------
+-- 3. Индексы data_sources
+-- ---------------------------------------------------------------------------
+
+-- Фильтр OAuth callback'ов: user_id + source_type
+CREATE INDEX IF NOT EXISTS idx_data_sources_user_type
+    ON data_sources (user_id, source_type);
+
+-- Планировщик sync_all_sources: "активные и просроченные"
+CREATE INDEX IF NOT EXISTS ix_ds_active_lastsync
+    ON data_sources (is_active, last_sync_at);
+
+-- Уникальные partial expression-индексы по JSONB settings: arbiter-индексы
+-- для INSERT ... ON CONFLICT в OAuth callback'ах. Без них callback падает с
+-- "no unique or exclusion constraint matching the ON CONFLICT specification".
+-- WHERE source_type = '...' работает и на старой enum-колонке, и на varchar
+CREATE UNIQUE INDEX IF NOT EXISTS idx_data_sources_twitter_uid
+    ON data_sources (user_id, (settings ->> 'twitter_user_id'))
+    WHERE source_type = 'twitter';
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_data_sources_facebook_uid
+    ON data_sources (user_id, (settings ->> 'facebook_user_id'))
+    WHERE source_type = 'facebook';
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_data_sources_instagram_uid
+    ON data_sources (user_id, (settings ->> 'user_id'))
+    WHERE source_type = 'instagram';
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_data_sources_telegram_bot_id
+    ON data_sources (user_id, (settings ->> 'bot_id'))
+    WHERE source_type = 'telegram';
+
+COMMIT;